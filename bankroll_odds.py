@@ -0,0 +1,127 @@
+import argparse
+
+import numpy as np
+
+from pi_rules import STARTING_COINS, WINNING_COIN_TARGET, DEFAULT_RULES
+
+# Risk of ruin / time-to-target for a whole game.
+# The coin count is a Markov chain over 0..target: 0 (out of coins) and target (game won) are
+# absorbing, every other state places a bet and moves according to the per-round outcome
+# distribution. Solving (I - Q) x = b over the transient states gives the chance of winning and
+# the expected number of rounds from every starting coin count at once.
+
+
+def all_in(coins):
+    # The "ALL IN" button: bet every coin
+    return coins
+
+
+def flat_bet(amount):
+    def policy(coins):
+        return amount
+    return policy
+
+
+def bet_policy(policy):
+    # Accepts a callable coins -> bet, an int (flat bet), "all_in", or a lookup table indexed by
+    # coins (e.g. from bet_policy.py). Bets above the coins left are lowered to coins, as ALL IN
+    # would; bets below 1 are not something the game allows and raise ValueError.
+    if isinstance(policy, str) and policy == "all_in":
+        policy = all_in
+    elif isinstance(policy, (int, np.integer)):
+        if policy < 1:
+            raise ValueError(f"Flat bet must be at least 1 coin, got {policy}")
+        policy = flat_bet(policy)
+    elif not callable(policy):
+        table = policy
+        policy = lambda coins: table[coins]
+
+    def clamped(coins):
+        bet = int(policy(coins))
+        if bet < 1:
+            raise ValueError(f"Bet policy bets {bet} with {coins} coins; bets must be at least 1 coin")
+        return min(bet, coins)
+    return clamped
+
+
+def round_outcomes(win, push, loss=None, rules=DEFAULT_RULES):
+    # Per-round outcome distribution keyed by payout multiplier
+    if loss is None:
+        loss = 1.0 - win - push
+        if -1e-9 < loss < 0:
+            loss = 0.0 # Rounding in 1 - win - push
+    for name, p in (("win", win), ("push", push), ("loss", loss)):
+        if not 0.0 <= p <= 1.0:
+            raise ValueError(f"P({name}) = {p:g} is not a probability (win {win:g}, push {push:g}, loss {loss:g})")
+    outcomes = {}
+    for multiplier, p in ((rules.payout_win, win), (rules.payout_push, push), (rules.payout_loss, loss)):
+        outcomes[multiplier] = outcomes.get(multiplier, 0.0) + p
+    return outcomes
+
+
+def check_outcomes(outcomes):
+    # Raises ValueError unless outcomes is a probability distribution: each entry in [0, 1], sum 1
+    for multiplier, p in outcomes.items():
+        if not 0.0 <= p <= 1.0:
+            raise ValueError(f"Probability {p:g} of payout multiplier {multiplier} is outside [0, 1]")
+    if abs(sum(outcomes.values()) - 1.0) > 1e-9:
+        raise ValueError("Round outcome probabilities must sum to 1")
+
+
+def transition_matrix(policy, outcomes, target=WINNING_COIN_TARGET):
+    policy = bet_policy(policy)
+    check_outcomes(outcomes)
+    # Coin counts are the states, so every payout has to stay a whole number of coins
+    # (the game itself would carry fractional coins instead)
+    for multiplier in outcomes:
+        if not float(multiplier).is_integer():
+            raise ValueError(f"Payout multiplier {multiplier} gives fractional coins; only whole multipliers are supported")
+
+    P = np.zeros((target + 1, target + 1))
+    P[0, 0] = 1.0
+    P[target, target] = 1.0
+    for coins in range(1, target):
+        bet = policy(coins)
+        for multiplier, p in outcomes.items():
+            # Same settlement as the game: the bet is taken off, then bet * multiplier is paid back.
+            # Anything at or past the target ends the game, so it is folded into the target state.
+            next_coins = min(coins - bet + bet * int(multiplier), target)
+            P[coins, next_coins] += p
+    return P
+
+
+def solve_bankroll(policy, outcomes, target=WINNING_COIN_TARGET):
+    # Returns (win_probability, expected_rounds) as arrays indexed by the current coin count
+    P = transition_matrix(policy, outcomes, target)
+    Q = P[1:target, 1:target]
+    A = np.eye(target - 1) - Q
+    b = np.column_stack((P[1:target, target], np.ones(target - 1)))
+    try:
+        x = np.linalg.solve(A, b)
+    except np.linalg.LinAlgError:
+        raise ValueError("Bet policy never ends the game from some coin count (e.g. only pushes)")
+
+    win_probability = np.concatenate(([0.0], x[:, 0], [1.0]))
+    expected_rounds = np.concatenate(([0.0], x[:, 1], [0.0]))
+    return win_probability, expected_rounds
+
+
+def game_odds(policy, outcomes, starting_coins=STARTING_COINS, target=WINNING_COIN_TARGET):
+    # Chance of reaching the target and expected rounds played for a single game
+    win_probability, expected_rounds = solve_bankroll(policy, outcomes, target)
+    return win_probability[starting_coins], expected_rounds[starting_coins]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chance of winning a game and its expected length")
+    parser.add_argument("--win", type=float, required=True, help="probability of winning a round")
+    parser.add_argument("--push", type=float, default=0.0, help="probability of a push")
+    parser.add_argument("--bet", default="all_in", help="flat bet amount or 'all_in'")
+    parser.add_argument("--start", type=int, default=STARTING_COINS)
+    parser.add_argument("--target", type=int, default=WINNING_COIN_TARGET)
+    args = parser.parse_args()
+
+    policy = args.bet if args.bet == "all_in" else int(args.bet)
+    p_win, rounds = game_odds(policy, round_outcomes(args.win, args.push), args.start, args.target)
+    print(f"P(reach {args.target} from {args.start}): {p_win:.4f}")
+    print(f"Expected rounds: {rounds:.1f}")
@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from pi_rules import WINNING_COIN_TARGET
+from bankroll_odds import check_outcomes, round_outcomes, solve_bankroll
+
+# Optimal betting: value iteration over coin counts 0..target.
+# V[c] is the best achievable chance of reaching the target from c coins; each sweep evaluates
+# every (coins, bet) pair at once as a (target+1) x (target+1) array, so the whole Bellman update
+# is a handful of numpy gathers. Each greedy sweep is followed by an exact evaluation of the
+# greedy policy, which keeps a full solve well under a second. The result is exported as a lookup table: bet per coin count.
+
+BET_TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bet_table.json")
+
+
+def _next_coins(outcomes, target):
+    # next_coins[m][c, b]: coins after betting b from c with payout multiplier m (capped at target)
+    coins = np.arange(target + 1)[:, None]
+    bets = np.arange(target + 1)[None, :]
+    return {m: np.clip((coins - bets + bets * m).astype(int), 0, target) for m in outcomes}
+
+
+def _greedy_bets(V, next_coins, outcomes, allowed):
+    # Bellman update for every (coins, bet) pair at once. Returns the new values and the
+    # smallest bet that is optimal (within tolerance) at each coin count.
+    Q = sum(p * V[next_coins[m]] for m, p in outcomes.items())
+    Q = np.where(allowed, Q, -np.inf)
+    best = Q.max(axis=1)
+    bets = np.argmax(Q >= best[:, None] - 1e-9, axis=1)
+    return best, bets
+
+
+def solve_bet_table(outcomes, target=WINNING_COIN_TARGET, tol=1e-10, max_iterations=100):
+    # Returns (table, win_probability): table[coins] is the bet that maximises the chance of
+    # reaching target (0 for the terminal states), win_probability[coins] is that chance.
+    check_outcomes(outcomes)
+    next_coins = _next_coins(outcomes, target)
+    coins = np.arange(target + 1)[:, None]
+    bets = np.arange(target + 1)[None, :]
+    allowed = (bets >= 1) & (bets <= coins)
+    allowed[0, :] = False
+    allowed[target, :] = False
+
+    # Value iteration with an exact policy evaluation after each greedy sweep (policy iteration).
+    # Plain sweeps crawl when small bets are optimal - values only spread one bet per sweep -
+    # while this settles in a few iterations whatever the odds.
+    # Start from ALL IN; it is close to optimal for unfavourable games.
+    table = [0] + list(range(1, target)) + [0]
+    V, _ = solve_bankroll(table, outcomes, target)
+    for _ in range(max_iterations):
+        best, greedy = _greedy_bets(V, next_coins, outcomes, allowed)
+        greedy[0] = 0
+        greedy[target] = 0
+        new_table = [int(bet) for bet in greedy]
+        if new_table == table or np.abs(best[1:target] - V[1:target]).max() < tol:
+            break
+        table = new_table
+        V, _ = solve_bankroll(table, outcomes, target)
+    return table, V
+
+
+def save_bet_table(table, outcomes, path=BET_TABLE_FILE):
+    data = {"target": len(table) - 1,
+            "outcomes": {str(m): p for m, p in outcomes.items()},
+            "bets": table}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+
+
+def load_bet_table(path=BET_TABLE_FILE, target=WINNING_COIN_TARGET):
+    # Returns the bet list, or None if there is no table (or it was solved for another target)
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("target") != target:
+        return None
+    return data["bets"]
+
+
+def suggested_bet(table, coins):
+    # Bet to place with the given coins; usable by the betting overlay and by bots
+    if table is None or coins <= 0 or coins >= len(table):
+        return 0
+    return table[coins]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve the bet that maximises the chance of reaching the target")
+    parser.add_argument("--win", type=float, required=True, help="probability of winning a round")
+    parser.add_argument("--push", type=float, default=0.0, help="probability of a push")
+    parser.add_argument("--target", type=int, default=WINNING_COIN_TARGET)
+    parser.add_argument("--out", default=BET_TABLE_FILE)
+    args = parser.parse_args()
+
+    outcomes = round_outcomes(args.win, args.push)
+    table, win_probability = solve_bet_table(outcomes, args.target)
+    save_bet_table(table, outcomes, args.out)
+    print(f"Saved bet table to {args.out}")
+    for coins in (1, 10, 50, 100, 200, args.target - 1):
+        if 0 < coins < args.target:
+            print(f"{coins:>4} coins: bet {table[coins]:>3}  P(win) {win_probability[coins]:.4f}")
@@ -0,0 +1,95 @@
+import pygame
+
+# Multi-denomination chip stacks for bet animations.
+# A bet is broken into stacks of 100/25/5/1 chips. Every (denomination, stack height) is drawn
+# once per layout size into a sprite (layout.Assets.sprite), so a flying ALL IN stack is a few
+# blits per frame with no text rendering. ChipAnimation objects are recycled through ChipPool
+# instead of being allocated for every bet.
+
+BLACK = (0, 0, 0)
+
+# (value, chip color), largest first; the label is drawn in the chip color on a black center
+DENOMINATIONS = [
+    (100, (128, 0, 128)),   # Purple
+    (25, (0, 255, 255)),    # Neon blue
+    (5, (255, 105, 180)),   # Pink
+    (1, (255, 215, 0)),     # Yellow, like the original π chip
+]
+MAX_STACK_HEIGHT = 10 # Taller stacks are split
+
+
+def chip_stacks(amount):
+    # [(denomination index, height)] for an amount, fewest chips first (e.g. 313 -> 3x100, 2x5, 3x1)
+    stacks = []
+    remaining = int(amount)
+    for index, (value, color) in enumerate(DENOMINATIONS):
+        count, remaining = divmod(remaining, value)
+        while count > 0:
+            height = min(count, MAX_STACK_HEIGHT)
+            stacks.append((index, height))
+            count -= height
+    return stacks
+
+
+def render_chip_stack(key, assets):
+    # Sprite for ("chip_stack", denomination index, height): chips bottom to top, label on the top one
+    _, index, height = key
+    layout = assets.layout
+    value, color = DENOMINATIONS[index]
+    radius = layout.chip_radius
+    step = layout.chip_stack_step
+    sprite = pygame.Surface((2 * radius + 1, 2 * radius + 1 + (height - 1) * step), pygame.SRCALPHA)
+    for i in range(height):
+        center = (radius, sprite.get_height() - radius - 1 - i * step)
+        pygame.draw.circle(sprite, color, center, radius)
+        pygame.draw.circle(sprite, BLACK, center, radius, 1) # Edge between stacked chips
+    pygame.draw.circle(sprite, BLACK, center, layout.chip_inner_radius) # Inner circle of the top chip
+    label = assets.fonts["chip"].render(str(value), True, color)
+    sprite.blit(label, label.get_rect(center=center))
+    return sprite
+
+
+def draw_chip_stacks(surface, assets, chip, pos):
+    # Stacks side by side, centered on pos (the bottom chips' centers are at pos)
+    layout = assets.layout
+    width = 2 * layout.chip_radius + 1
+    gap = layout.chip_stack_gap
+    x = pos[0] - (len(chip.stacks) * (width + gap) - gap) / 2
+    for index, height in chip.stacks:
+        sprite = assets.sprite(("chip_stack", index, height), render_chip_stack)
+        surface.blit(sprite, (x, pos[1] + layout.chip_radius + 1 - sprite.get_height()))
+        x += width + gap
+
+
+class ChipAnimation:
+    def __init__(self):
+        self.reset(None, None, 1, 0)
+
+    def reset(self, start_pos, end_pos, duration, amount):
+        self.start_pos = start_pos
+        self.end_pos = end_pos
+        self.duration = duration
+        self.elapsed = 0
+        self.amount = amount
+        self.stacks = chip_stacks(amount) # Worked out once per bet, not per frame
+
+    def update(self, dt):
+        self.elapsed += dt
+        progress = min(self.elapsed / self.duration, 1.0)
+        # Simple linear interpolation
+        current_x = self.start_pos[0] + (self.end_pos[0] - self.start_pos[0]) * progress
+        current_y = self.start_pos[1] + (self.end_pos[1] - self.start_pos[1]) * progress
+        return (current_x, current_y), progress >= 1.0
+
+
+class ChipPool:
+    def __init__(self):
+        self.free = []
+
+    def acquire(self, start_pos, end_pos, duration, amount):
+        chip = self.free.pop() if self.free else ChipAnimation()
+        chip.reset(start_pos, end_pos, duration, amount)
+        return chip
+
+    def release(self, chip):
+        self.free.append(chip)
@@ -0,0 +1,220 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from options import positive_setting
+from pi_rules import DEFAULT_RULES, assign_dealer_pi, dealer_pi_value, settle
+
+# Search-based dealer (opt-in: PIBJ_DEALER_AI=<milliseconds per decision>, or --dealer-ai).
+# Instead of the rule book (hit below rules.dealer_stand, greedy PI values) it plays to beat the
+# total the player stood on: an anytime expectimax over the deck's composition - iterative
+# deepening, a transposition table on (total, composition) - returns the best move found when the
+# time budget runs out. It runs in a worker thread that pauses while the game draws a frame
+# (frame_started() / frame_finished()), so the pure-Python search does not hold up frames.
+# The analysis tools (dealer_odds.py, state_explorer.py, tournament.py) model the rule-book dealer.
+
+DEFAULT_BUDGET_MS = 250      # --dealer-ai without PIBJ_DEALER_AI
+YIELD_NODES = 8              # Positions searched between deadline / frame checks (~0.1-0.2 ms)
+MAX_TABLE_ENTRIES = 500000   # The transposition table is cleared when it grows past this
+
+
+class _Timeout(Exception):
+    pass
+
+
+def dealer_ai_budget(argv=None):
+    # Milliseconds per decision, or None for the rule-book dealer
+    return positive_setting("PIBJ_DEALER_AI", "--dealer-ai", str(DEFAULT_BUDGET_MS), "milliseconds per decision", argv)
+
+
+def rule_book_move(values, rules=DEFAULT_RULES):
+    # (PI values, hit) the rule-book dealer plays for a hand (None for unassigned PI cards)
+    assigned = assign_dealer_pi(values, rules)
+    pi_values = [value for value, old in zip(assigned, values) if old is None]
+    return pi_values, sum(assigned) < rules.dealer_stand
+
+
+class DealerAI:
+    def __init__(self, rules=DEFAULT_RULES, budget_ms=None):
+        self.rules = rules
+        self.budget_ms = dealer_ai_budget() if budget_ms is None else budget_ms
+        self.enabled = self.budget_ms is not None
+        self.values = rules.class_values()
+        # Best result the dealer can get: the player is paid the smallest multiplier
+        self.best = -min(rules.payout_win, rules.payout_push, rules.payout_loss)
+        self.table = {}  # (total, composition) -> (depth searched, math.inf if exact; dealer value)
+        self.table_player_total = None
+        self.executor = None
+        self.future = None
+        self.generation = 0 # Bumped to stop the running search
+        self.deadline = 0.0
+        self.search_generation = 0
+        self.player_total = 0
+        self.nodes = 0
+        self.cuts = 0
+        self.frame_idle = threading.Event() # Clear while the render thread works on a frame
+        self.frame_idle.set()
+        if self.enabled:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dealer-ai")
+            print(f"Search dealer on: {self.budget_ms:g} ms per decision")
+
+    @property
+    def thinking(self):
+        return self.future is not None
+
+    def think(self, values, composition, player_total):
+        # Start searching a decision. values: the dealer's card values in hand order, None for
+        # unassigned PI cards; composition: the deck (ShoeTracker.composition()).
+        self.cancel()
+        deadline = time.perf_counter() + self.budget_ms / 1000
+        self.future = self.executor.submit(self.search, list(values), tuple(composition), player_total,
+                                           deadline, self.generation)
+
+    def frame_started(self):
+        # Called by the game loop when a frame's work begins; the search pauses at its next check
+        self.frame_idle.clear()
+
+    def frame_finished(self):
+        # ... and when the frame is done and the loop is about to wait for the next one
+        self.frame_idle.set()
+
+    def wait(self):
+        # Block until the running search has a move (for callers without idle time between frames)
+        if self.future is not None:
+            wait([self.future])
+
+    def poll(self):
+        # The move as (PI values for the unassigned PI cards, hit) once the search is done, else None
+        if self.future is None or not self.future.done():
+            return None
+        move = self.future.result()
+        self.future = None
+        return move
+
+    def cancel(self):
+        # Drop a search that is still running (new round, restart); the worker stops at its next check
+        if self.future is not None:
+            self.generation += 1
+            self.future = None
+
+    def search(self, values, composition, player_total, deadline, generation):
+        start = time.perf_counter()
+        self.deadline = deadline
+        self.search_generation = generation
+        if player_total != self.table_player_total or len(self.table) > MAX_TABLE_ENTRIES:
+            self.table = {} # Values depend on the player's total
+            self.table_player_total = player_total
+        self.player_total = player_total
+        self.nodes = 0
+        total = sum(value for value in values if value is not None)
+        pending = sum(1 for value in values if value is None)
+
+        move = rule_book_move(values, self.rules) # Played if not even the first pass finishes
+        depth = 1
+        exact = False
+        while True:
+            cuts = self.cuts
+            try:
+                value, pi_values, hit = self.root(total, pending, composition, depth)
+            except _Timeout:
+                break
+            move = (pi_values, hit)
+            if self.cuts == cuts:
+                exact = True
+                break
+            depth += 1
+        seconds = time.perf_counter() - start
+        print(f"Dealer AI: {'hit' if move[1] else 'stand'}{' with PI ' + str(move[0]) if move[0] else ''} "
+              f"({'exact' if exact else f'depth {depth - 1}'}, {self.nodes} positions, {seconds * 1000:.0f} ms)")
+        return move
+
+    # --- Expectimax; values are the negated payout multiplier of the player (higher is better for the dealer) ---
+    def pi_candidates(self, total):
+        # Whole numbers that do not bust plus the rule-book value; best-first so a sure win cuts off early
+        candidates = list(range(max(1, math.floor(self.rules.threshold - total)), 0, -1))
+        greedy = dealer_pi_value(total, self.rules)
+        if greedy not in candidates:
+            candidates.insert(0, greedy)
+        return candidates
+
+    def root(self, total, pending, composition, depth):
+        # Returns (value, PI values, hit)
+        if pending:
+            best = None
+            for pi_value in self.pi_candidates(total):
+                value, pi_values, hit = self.root(total + pi_value, pending - 1, composition, depth)
+                if best is None or value > best[0]:
+                    best = (value, [pi_value] + pi_values, hit)
+                if value >= self.best:
+                    break
+            return best
+        stand = self.stand_value(total)
+        if total > self.rules.threshold or stand >= self.best:
+            return stand, [], False
+        hit = self.draw_value(total, composition, depth)
+        return (hit, [], True) if hit > stand else (stand, [], False)
+
+    def pi_value(self, total, composition, depth):
+        # Max node: the best value for a PI card just drawn
+        best = None
+        for pi_value in self.pi_candidates(total):
+            value = self.position_value(total + pi_value, composition, depth)
+            if best is None or value > best:
+                best = value
+            if best >= self.best:
+                break
+        return best
+
+    def stand_value(self, total):
+        return -settle(self.player_total, total, self.rules)[1]
+
+    def position_value(self, total, composition, depth):
+        # Dealer to choose hit or stand with every PI card assigned
+        self.nodes += 1
+        if self.nodes % YIELD_NODES == 0:
+            self.yield_to_frame()
+        stand = self.stand_value(total)
+        if total > self.rules.threshold or stand >= self.best:
+            return stand
+        if depth == 0:
+            self.cuts += 1
+            return stand
+        key = (round(total, 9), composition) # Float sums depend on the order the cards came in
+        entry = self.table.get(key)
+        if entry is not None and entry[0] >= depth:
+            if entry[0] != math.inf:
+                self.cuts += 1 # Reusing a depth-limited value keeps this pass inexact
+            return entry[1]
+        cuts = self.cuts
+        value = max(stand, self.draw_value(total, composition, depth))
+        self.table[key] = (math.inf if self.cuts == cuts else depth, value)
+        return value
+
+    def yield_to_frame(self):
+        now = time.perf_counter()
+        if now > self.deadline or self.search_generation != self.generation:
+            raise _Timeout()
+        if self.frame_idle.is_set():
+            time.sleep(0) # Let the render thread take the GIL if it just woke up
+        else:
+            self.frame_idle.wait(self.deadline - now) # Sit out the frame's work
+
+    def draw_value(self, total, composition, depth):
+        # Chance node: expected value of drawing one card (an empty deck is reshuffled, like the game does)
+        if not any(composition):
+            composition = self.rules.fresh_shoe()
+        n = sum(composition)
+        expected = 0.0
+        for i, count in enumerate(composition):
+            if not count:
+                continue
+            remaining = composition[:i] + (count - 1,) + composition[i + 1:]
+            value = self.values[i]
+            if value is None:
+                # A PI card: the dealer picks its value before deciding again
+                outcome = self.pi_value(total, remaining, depth - 1)
+            else:
+                outcome = self.position_value(total + value, remaining, depth - 1)
+            expected += count / n * outcome
+        return expected
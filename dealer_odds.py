@@ -0,0 +1,153 @@
+import functools
+import json
+import os
+import sys
+
+from pi_rules import (DEFAULT_RULES, CARD_CLASSES, assign_dealer_pi, dealer_pi_value, card_class,
+                      shoe_composition, rules_hash)
+
+# Exact distribution of the dealer's final total, following dealer_turn() in main_new.py:
+# reveal the hole card, auto-assign PI cards, then hit while the total is below the dealer's
+# stand value. No simulation - every branch of the remaining shoe is weighted exactly,
+# and sub-results are memoized on (dealer total, shoe composition) so repeated queries during a
+# round (e.g. after every card drawn) only pay for the states they have not seen yet.
+
+BUST = "bust"  # Key used for the bust probability in a distribution
+FRESH_SHOE_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dealer_odds_cache.json")
+
+
+def _draws(counts, rules):
+    # Yield (probability, class index, counts after drawing) for every card class still in the shoe.
+    # An empty shoe is reshuffled into a fresh one, like dealer_turn() does.
+    if not any(counts):
+        counts = rules.fresh_shoe()
+    n = sum(counts)
+    for i, c in enumerate(counts):
+        if c:
+            remaining = counts[:i] + (c - 1,) + counts[i + 1:]
+            yield c / n, i, remaining
+
+
+@functools.lru_cache(maxsize=None)
+def _final_totals(total, counts, rules):
+    # Distribution of final totals from a dealer total (already in hand order) and the shoe.
+    # Returned dicts are shared through the cache - callers must not mutate them.
+    if total >= rules.dealer_stand:
+        return {BUST if total > rules.threshold else total: 1.0}
+
+    values = rules.class_values()
+    dist = {}
+    for p, i, remaining in _draws(counts, rules):
+        value = values[i]
+        if value is None:
+            # A PI card dealt on a hit is the newest card, so the running total is exactly the
+            # current_total auto_assign_dealer_pi() works from
+            value = dealer_pi_value(total, rules)
+        for outcome, q in _final_totals(total + value, remaining, rules).items():
+            dist[outcome] = dist.get(outcome, 0.0) + p * q
+    return dist
+
+
+def _class_index(card):
+    # Accept a card dict (as held in dealer_cards/deck) or a CARD_CLASSES label
+    if isinstance(card, dict):
+        return card_class(card)
+    return CARD_CLASSES.index(card)
+
+
+def _opening_total(up_index, hole_index, rules):
+    # Total after the hole card is revealed and auto_assign_dealer_pi() has run,
+    # summed in hand order like calculate_dealer_total()
+    values = rules.class_values()
+    total = 0
+    for value in assign_dealer_pi([values[up_index], values[hole_index]], rules):
+        total += value
+    return total
+
+
+def dealer_distribution(upcard, shoe, hole_card=None, rules=DEFAULT_RULES):
+    # upcard: the dealer's face-up card (card dict or CARD_CLASSES label).
+    # shoe: every card the dealer could still receive - the remaining deck plus the hole card while
+    #       it is face down - as a list of card dicts or a composition tuple from shoe_composition().
+    # hole_card: pass the hole card once it is known (and leave it out of shoe).
+    # Returns {final total: probability, BUST: probability}.
+    counts = shoe if isinstance(shoe, tuple) else shoe_composition(shoe)
+    up_index = _class_index(upcard)
+
+    if hole_card is not None:
+        return dict(_final_totals(_opening_total(up_index, _class_index(hole_card), rules), counts, rules))
+
+    dist = {}
+    for p, hole_index, remaining in _draws(counts, rules):
+        for outcome, q in _final_totals(_opening_total(up_index, hole_index, rules), remaining, rules).items():
+            dist[outcome] = dist.get(outcome, 0.0) + p * q
+    return dist
+
+
+def bust_probability(dist):
+    return dist.get(BUST, 0.0)
+
+
+def clear_cache():
+    _final_totals.cache_clear()
+
+
+# --- Fresh shoe table (cached to disk) ---
+
+def build_fresh_shoe_table(rules=DEFAULT_RULES):
+    # Distribution for every possible upcard dealt from a fresh shoe
+    fresh = rules.fresh_shoe()
+    table = {}
+    for i, label in enumerate(CARD_CLASSES):
+        if fresh[i]:
+            shoe = fresh[:i] + (fresh[i] - 1,) + fresh[i + 1:]
+            table[label] = dealer_distribution(label, shoe, rules=rules)
+    return table
+
+
+def save_fresh_shoe_table(table, rules=DEFAULT_RULES, path=FRESH_SHOE_CACHE):
+    # The rules hash is stored alongside the table so a rules change invalidates the file
+    data = {"rules": rules_hash(rules),
+            "table": {label: [[outcome, p] for outcome, p in dist.items()] for label, dist in table.items()}}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def load_fresh_shoe_table(rules=DEFAULT_RULES, path=FRESH_SHOE_CACHE):
+    # Returns None if there is no cache file or it was built for different rules
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("rules") != rules_hash(rules):
+        return None
+    return {label: {outcome: p for outcome, p in pairs} for label, pairs in data["table"].items()}
+
+
+_fresh_shoe_tables = {}  # rules -> table
+
+
+def fresh_shoe_distribution(upcard, rules=DEFAULT_RULES, path=FRESH_SHOE_CACHE):
+    # Distribution for an upcard dealt from a fresh shoe, loaded from (or written to) the disk cache
+    table = _fresh_shoe_tables.get(rules)
+    if table is None:
+        table = load_fresh_shoe_table(rules, path)
+        if table is None:
+            table = build_fresh_shoe_table(rules)
+            try:
+                save_fresh_shoe_table(table, rules, path)
+            except OSError as e:
+                print(f"Could not write dealer odds cache: {e}")
+        _fresh_shoe_tables[rules] = table
+    return dict(table[CARD_CLASSES[_class_index(upcard)]])
+
+
+if __name__ == "__main__":
+    # Print the fresh shoe table: bust chance and most likely final totals per upcard
+    path = sys.argv[1] if len(sys.argv) > 1 else FRESH_SHOE_CACHE
+    for label in CARD_CLASSES:
+        dist = fresh_shoe_distribution(label, path=path)
+        totals = sorted(((p, t) for t, p in dist.items() if t != BUST), reverse=True)[:3]
+        top = ", ".join(f"{t:.2f}: {p:.4f}" for p, t in totals)
+        print(f"Upcard {label:>2}: bust {bust_probability(dist):.4f} | {top}")
@@ -0,0 +1,205 @@
+import argparse
+import collections
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+# Headless replay exporter: renders a session recording (replay.py, PIBJ_RECORD=<file>) to an
+# image sequence through the game's own main loop and draw_* functions, so frames look exactly
+# like the game did, cached card/text/overlay surfaces included.
+# export() runs the game in a child process with its own environment (so the caller's is left
+# alone), on the SDL dummy driver with a virtual clock: every frame advances a fixed
+# timestep instead of waiting in clock.tick, and stretches with nothing animating while the
+# player thought are cut to --max-idle seconds. Recorded inputs are fed back at their game time
+# once the game reaches the game_state they were recorded in. PNG/JPG encoding runs in a thread
+# pool on copies of the frames while the next frame is drawn.
+# Sessions recorded with the search dealer (dealer_ai.py) replay with the same time budget; a
+# decision cut off by its budget can come out differently on another machine and shows up as
+# inputs out of sync.
+
+
+class ReplayDriver:
+    def __init__(self, game, header, frames, out_dir, fps, image_format, max_idle, sync_timeout, pool, max_queued):
+        self.game = game
+        self.seed = header["seed"]
+        self.frames = frames
+        self.index = 0
+        self.out_dir = out_dir
+        self.step_ms = 1000.0 / fps
+        self.image_format = image_format
+        self.max_idle_ms = max_idle * 1000
+        self.sync_timeout_ms = sync_timeout * 1000
+        self.pool = pool
+        self.max_queued = max_queued
+        self.queued = collections.deque()
+        self.present = game.present_frame
+        self.time_ms = 0.0
+        self.mouse = (0, 0)
+        self.started = False
+        self.quit_sent = False
+        self.frame_count = 0
+        self.desyncs = 0
+
+    def animating(self):
+        game = self.game
+        return bool(game.animation_queue or game.active_animation or game.chip_animations)
+
+    # --- Replacements for the game's clock, input and present_frame ---
+    def tick(self, fps=0):
+        if not self.started:
+            # The session was restored from the recording's snapshot; now repeat its reshuffles
+            self.game.shuffle_rng.seed(self.seed)
+            self.started = True
+        # Frames follow each other without waiting here, which would leave the search dealer no
+        # idle time to think in; let it finish its decision like it could in the recorded session
+        self.game.dealer_ai.wait()
+        if self.index < len(self.frames) and not self.animating():
+            next_input_ms = self.frames[self.index][0]
+            if next_input_ms - self.time_ms > self.max_idle_ms:
+                self.time_ms = next_input_ms - self.max_idle_ms # Skip the player's thinking time
+        self.time_ms += self.step_ms
+        return self.step_ms
+
+    def get_fps(self):
+        return 1000.0 / self.step_ms
+
+    def due_input(self):
+        # The next recorded input, if it should be delivered this frame
+        if self.index >= len(self.frames):
+            return None
+        time_ms, game_state, mouse, events = self.frames[self.index]
+        if self.time_ms < time_ms:
+            return None
+        if game_state != self.game.game_state and self.time_ms - time_ms < self.sync_timeout_ms:
+            return None # Input recorded after an animation that has not finished here yet: wait for it
+        return self.frames[self.index]
+
+    def get_mouse_pos(self):
+        # The game reads the mouse before polling, so a due click must already move it
+        frame = self.due_input()
+        if frame is not None:
+            self.mouse = frame[2]
+        return self.game.layout.point(*self.mouse)
+
+    def poll_events(self):
+        if self.index >= len(self.frames):
+            if self.quit_sent or self.animating():
+                return []
+            self.quit_sent = True
+            return [pygame.event.Event(pygame.QUIT)]
+        frame = self.due_input()
+        if frame is None:
+            return []
+        time_ms, game_state, mouse, events = frame
+        if game_state != self.game.game_state:
+            self.desyncs += 1
+            print(f"Replay out of sync at {time_ms / 1000:.1f}s: recorded in {game_state}, game is in {self.game.game_state}")
+        self.index += 1
+        self.mouse = mouse
+        return events
+
+    def present_frame(self):
+        self.present()
+        self.frame_count += 1
+        path = os.path.join(self.out_dir, f"frame_{self.frame_count:06d}.{self.image_format}")
+        self.queued.append(self.pool.submit(pygame.image.save, self.game.window.copy(), path))
+        while len(self.queued) > self.max_queued:
+            self.queued.popleft().result() # Back-pressure: do not keep more frames in memory than this
+        if self.quit_sent:
+            while self.queued:
+                self.queued.popleft().result() # Last frame: finish encoding before the game calls pygame.quit()
+        if self.frame_count % 1000 == 0:
+            print(f"Rendered {self.frame_count} frames ({self.index}/{len(self.frames)} inputs)")
+
+
+def export(recording, out_dir, fps=30, size=None, image_format="png", max_idle=1.0, sync_timeout=5.0, workers=None):
+    # The game runs in a child process with an environment of its own: the caller's environment is
+    # left as it was, and every export starts from a freshly imported main_new
+    from replay import load_recording
+    header, frames = load_recording(recording)
+    work_dir = tempfile.mkdtemp(prefix="pibj-replay-")
+    try:
+        # The game restores the recording's first state from its snapshot file; use a private one
+        snapshot_path = os.path.join(work_dir, "session.snap")
+        with open(snapshot_path, "wb") as f:
+            f.write(header["snapshot"])
+        # Only the recording decides how the game runs: drop the caller's game settings (recording,
+        # render profile, metrics port, memory watch, latency reports, ...)
+        env = {name: value for name, value in os.environ.items() if not name.startswith("PIBJ_")}
+        env.update(SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PIBJ_RENDER_PROFILE="default", PIBJ_SNAPSHOT=snapshot_path)
+        if header.get("dealer_ai"):
+            env["PIBJ_DEALER_AI"] = str(header["dealer_ai"])
+        result_path = os.path.join(work_dir, "frame_count")
+        command = [sys.executable, os.path.abspath(__file__), recording, out_dir, "--fps", str(fps),
+                   "--format", image_format, "--max-idle", str(max_idle), "--sync-timeout", str(sync_timeout),
+                   "--result", result_path]
+        if size is not None:
+            command += ["--size", f"{size[0]}x{size[1]}"]
+        if workers:
+            command += ["--workers", str(workers)]
+        subprocess.run(command, env=env, check=True)
+        with open(result_path, encoding="utf-8") as f:
+            return int(f.read())
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _render(recording, out_dir, fps, size, image_format, max_idle, sync_timeout, workers):
+    # Runs in the child process started by export(), with the environment it set up
+    sys.argv = sys.argv[:1] # The game reads --flags too; they are the exporter's here, not the game's
+    from replay import load_recording
+    header, frames = load_recording(recording)
+
+    import main_new as game
+    if size is not None:
+        pygame.display.set_mode(size)
+        game.apply_display_size()
+    os.makedirs(out_dir, exist_ok=True)
+
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        driver = ReplayDriver(game, header, frames, out_dir, fps, image_format, max_idle, sync_timeout, pool, 4 * workers)
+        game.clock = driver
+        game.poll_events = driver.poll_events
+        game.get_mouse_pos = driver.get_mouse_pos
+        game.present_frame = driver.present_frame
+        try:
+            game.main()
+        except SystemExit:
+            pass
+
+    seconds = time.perf_counter() - start
+    print(f"Exported {driver.frame_count} frames ({driver.frame_count / fps:.0f}s of video at {fps} FPS) "
+          f"to {out_dir} in {seconds:.1f}s; {driver.desyncs} inputs out of sync")
+    return driver.frame_count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render a recorded session to an image sequence")
+    parser.add_argument("recording", help="file recorded with PIBJ_RECORD=<file>")
+    parser.add_argument("out_dir")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--size", help="frame size, e.g. 1920x1080 (default 1200x600)")
+    parser.add_argument("--format", default="png", choices=["png", "jpg", "bmp", "tga"])
+    parser.add_argument("--max-idle", type=float, default=1.0, help="seconds to keep of each pause between inputs")
+    parser.add_argument("--workers", type=int, default=None, help="encoding threads")
+    parser.add_argument("--sync-timeout", type=float, default=5.0, help="seconds to wait for a recorded game_state")
+    parser.add_argument("--result", help=argparse.SUPPRESS) # Set by export() for its child process
+    args = parser.parse_args()
+
+    size = tuple(int(n) for n in args.size.lower().split("x")) if args.size else None
+    if args.result:
+        frame_count = _render(args.recording, args.out_dir, args.fps, size, args.format, args.max_idle,
+                              args.sync_timeout, args.workers)
+        with open(args.result, "w", encoding="utf-8") as f:
+            f.write(str(frame_count))
+    else:
+        export(args.recording, args.out_dir, args.fps, size, args.format, args.max_idle, args.sync_timeout, args.workers)
+    sys.exit(0)
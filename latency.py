@@ -0,0 +1,118 @@
+import time
+
+import pygame
+
+from options import switch_enabled
+
+# Input-to-display latency tracing (opt-in: PIBJ_LATENCY=1 or --latency).
+# Every frame the game polls SDL once; inputs are stamped at that poll. The code that acts on an
+# input calls changed(<input type>) where the game state changes, and the flip that first shows
+# the change closes the trace: the same frame's flip, or the next one for changes made after the
+# affected part of the frame was already drawn (the HIT/STAND buttons are handled while drawing).
+# Per input type we keep histograms of:
+#   queued  - time since the previous poll (upper bound on how long the event waited in SDL's queue;
+#             pygame events carry no SDL timestamp)
+#   handle  - poll -> game state change
+#   display - state change -> display flip done
+#   total   - poll -> display flip done
+# The report is printed when the game exits.
+
+# Histogram bucket upper bounds in milliseconds (roughly doubling; 16.7/33.3 are one 60/30 FPS frame)
+BUCKETS_MS = [0.5, 1, 2, 4, 8, 16.7, 33.3, 50, 66.7, 100, 150, 250, 500, 1000, float("inf")]
+SPANS = ["queued", "handle", "display", "total"]
+
+
+def latency_enabled(argv=None):
+    return switch_enabled("PIBJ_LATENCY", "--latency", argv)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS_MS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        i = 0
+        while ms > BUCKETS_MS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, p):
+        # Upper bound of the bucket that holds the p-th percentile (the max for the last bucket)
+        rank = p * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(bound, self.max)
+        return self.max
+
+
+class LatencyTracer:
+    def __init__(self, enabled=None):
+        self.enabled = latency_enabled() if enabled is None else enabled
+        self.histograms = {}   # (input type, span) -> Histogram
+        self.poll_time = None
+        self.previous_poll = None
+        self.has_input = False
+        self.changes = []      # [input type, poll time, queued ms, change time, flips to wait] not yet on screen
+
+    def poll(self, events):
+        # Call right after pygame.event.get()
+        if not self.enabled:
+            return
+        self.previous_poll, self.poll_time = self.poll_time, time.perf_counter()
+        self.has_input = any(event.type in (pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN) for event in events)
+
+    def changed(self, input_type, next_frame=False):
+        # The game state changed in response to this frame's input; next_frame=True when this
+        # frame has already drawn the affected part, so the change first shows on the next flip
+        if self.enabled and self.has_input:
+            queued = (self.poll_time - self.previous_poll) * 1000 if self.previous_poll is not None else 0.0
+            self.changes.append([input_type, self.poll_time, queued, time.perf_counter(), 2 if next_frame else 1])
+
+    def flipped(self):
+        # Call right after pygame.display.flip()
+        if not self.enabled or not self.changes:
+            return
+        now = time.perf_counter()
+        waiting = []
+        for change in self.changes:
+            change[4] -= 1
+            if change[4] > 0:
+                waiting.append(change)
+                continue
+            input_type, poll_time, queued, change_time, _ = change
+            spans = {"queued": queued,
+                     "handle": (change_time - poll_time) * 1000,
+                     "display": (now - change_time) * 1000,
+                     "total": (now - poll_time) * 1000}
+            for span, ms in spans.items():
+                histogram = self.histograms.get((input_type, span))
+                if histogram is None:
+                    histogram = self.histograms[(input_type, span)] = Histogram()
+                histogram.add(ms)
+        self.changes = waiting
+
+    def report(self):
+        if not self.enabled:
+            return
+        if not self.histograms:
+            print("Latency: no inputs traced.")
+            return
+        print("Input latency (ms)        count   mean    p50    p95    p99    max")
+        for input_type in sorted({input_type for input_type, span in self.histograms}):
+            for span in SPANS:
+                h = self.histograms[(input_type, span)]
+                print(f"  {input_type + ' ' + span:<22} {h.count:6d} {h.total / h.count:6.1f} {h.percentile(0.5):6.1f} "
+                      f"{h.percentile(0.95):6.1f} {h.percentile(0.99):6.1f} {h.max:6.1f}")
+        print("Total latency buckets (ms, upper bound: count)")
+        for input_type in sorted({input_type for input_type, span in self.histograms}):
+            h = self.histograms[(input_type, "total")]
+            buckets = ", ".join(f"{bound:g}: {count}" for bound, count in zip(BUCKETS_MS, h.counts) if count)
+            print(f"  {input_type:<12} {buckets}")
@@ -0,0 +1,170 @@
+import functools
+
+import pygame
+
+# Resolution-independent layout.
+# Every anchor of the table is designed on a 1200x600 board (the game's original window). A Layout
+# scales that board uniformly to fit the target size and centers it, so the table keeps its
+# proportions on 720p, 1080p and 4K screens; full-screen things (background, overlays) still use
+# the whole surface. Layouts are built once per size and cached, and Assets holds the fonts and
+# sprites pre-rendered at that size, so nothing is scaled or re-rasterized per frame.
+
+BASE_WIDTH, BASE_HEIGHT = 1200, 600
+BASE_FONT_SIZES = {"large": 40, "medium": 32, "small": 24, "chip": 14}
+CARD_SIZE = (60, 90)
+
+
+class Layout:
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.scale = min(width / BASE_WIDTH, height / BASE_HEIGHT)
+        self.offset_x = (width - BASE_WIDTH * self.scale) / 2
+        self.offset_y = (height - BASE_HEIGHT * self.scale) / 2
+        cx, cy = BASE_WIDTH // 2, BASE_HEIGHT // 2
+        self.screen_rect = pygame.Rect(0, 0, width, height)
+
+        self.card_size = self.size(*CARD_SIZE)
+        self.card_radius = self.px(5)
+        self.card_rank_offset = self.size(5, 5)
+        self.card_suit_offset = self.size(5, 20)
+        self.card_border = self.px(2)
+
+        # Deck and card targets
+        self.deck_pos = self.point(100, 100)
+        self.dealer_targets = [self.point(cx - 150, 130), self.point(cx - 70, 130)]
+        self._dealer_targets = {}
+        self._player_targets = {}
+
+        # Menu icon
+        self.menu_icon_rect = self.rect(30, 30, 40, 30)
+        self.menu_icon_lines = [(self.point(35, 38 + i * 8), self.point(65, 38 + i * 8)) for i in range(3)]
+        self.menu_icon_line_width = self.px(4)
+
+        # Totals
+        self.player_label_pos = self.point(50, cy - 120)
+        self.player_circle_center = self.point(200, cy - 20)
+        self.dealer_label_pos = self.point(BASE_WIDTH - 350, cy - 120)
+        self.dealer_circle_center = self.point(BASE_WIDTH - 200, cy - 20)
+        self.total_radius = self.px(40)
+        self.total_ring_radius = self.px(44)
+        self.total_ring_width = self.px(4)
+        self.pi_prompt_center = self.point(200, cy - 20 + 60)
+        self.pi_prompt_padding = self.size(10, 5)
+
+        # Betting overlay
+        self.bet_title_center = self.point(cx, cy - 180)
+        self.bet_win_condition_center = self.point(cx, cy - 130)
+        self.bet_coins_center = self.point(cx, cy - 80)
+        self.bet_amount_center = self.point(cx, cy - 40)
+        self.bet_instructions_center = self.point(cx, cy + 10)
+        self.all_in_rect = self.rect(cx - 90, cy + 60, 180, 50)
+
+        # Coin total (bottom-left) and chips
+        self.coin_total_pos = self.point(10, BASE_HEIGHT - 30)
+        self.bet_display_pos = self.point(150, BASE_HEIGHT - 30)
+        self.chip_radius = self.px(15)
+        self.chip_inner_radius = self.px(13)
+        self.chip_stack_step = self.px(4)  # Offset between chips in a stack
+        self.chip_stack_gap = self.px(6)   # Space between stacks
+        self.coin_area_pos = self.point(60, BASE_HEIGHT - 20)
+        self.bet_area_pos = self.point(cx, cy + 80)
+
+        # Menu overlay
+        self.menu_rect = self.rect(50, 50, 400, 300)
+        self.menu_title_center = self.point(50 + 200, 50 + 40)
+        self.menu_option_pos = [self.point(50 + 50, 50 + 90 + i * 70) for i in range(3)]
+        self.menu_hover_inflate = self.size(10, 2)
+
+        # Centered overlay text (round result, restart confirmation, game over/won)
+        self.restart_confirm_center = self.point(cx, cy)
+        self.result_center = self.point(cx, cy - 50)
+        self.result_prompt_center = self.point(cx, cy + 20)
+        self.game_over_title_center = self.point(cx, cy - 60)
+        self.game_over_reason_center = self.point(cx, cy)
+        self.game_over_restart_center = self.point(cx, cy + 60)
+        self.game_won_title_center = self.point(cx, cy - 80)
+        self.game_won_congrats_center = self.point(cx, cy - 20)
+        self.game_won_reason_center = self.point(cx, cy + 20)
+        self.game_won_restart_center = self.point(cx, cy + 80)
+
+        # Hit/Stand buttons
+        self.hit_rect = self.rect(BASE_WIDTH // 4 - 90, BASE_HEIGHT - 100, 180, 60)
+        self.stand_rect = self.rect(3 * BASE_WIDTH // 4 - 90, BASE_HEIGHT - 100, 180, 60)
+        self.button_radius = self.px(12)
+
+    # --- Base (1200x600) to pixel conversions ---
+    def px(self, length):
+        return max(1, round(length * self.scale))
+
+    def size(self, w, h):
+        return (self.px(w), self.px(h))
+
+    def point(self, x, y):
+        return (round(self.offset_x + x * self.scale), round(self.offset_y + y * self.scale))
+
+    def rect(self, x, y, w, h):
+        return pygame.Rect(self.point(x, y), self.size(w, h))
+
+    def to_base(self, pos):
+        return ((pos[0] - self.offset_x) / self.scale, (pos[1] - self.offset_y) / self.scale)
+
+    def dealer_target(self, card_index):
+        # Initial two cards use dealer_targets; each hit goes one card width + spacing further right
+        # of the second (initially hidden) card
+        if card_index < 2:
+            return self.dealer_targets[card_index]
+        target = self._dealer_targets.get(card_index)
+        if target is None:
+            card_width, spacing = CARD_SIZE[0], 15
+            target = self.point(BASE_WIDTH // 2 - 70 + (card_index - 1) * (card_width + spacing), 130)
+            self._dealer_targets[card_index] = target
+        return target
+
+    def player_targets(self, num_cards):
+        targets = self._player_targets.get(num_cards)
+        if targets is None:
+            card_width = CARD_SIZE[0]
+            # Adjust spacing based on number of cards to prevent overlap
+            spacing = 15 if num_cards <= 5 else 10 if num_cards <= 7 else 5
+            total_width = num_cards * card_width + (num_cards - 1) * spacing
+            start_x = (BASE_WIDTH - total_width) // 2
+            y = BASE_HEIGHT - 200 # Player card Y position
+            targets = [self.point(start_x + i * (card_width + spacing), y) for i in range(num_cards)]
+            self._player_targets[num_cards] = targets
+        return targets
+
+
+@functools.lru_cache(maxsize=8)
+def get_layout(width, height):
+    return Layout(width, height)
+
+
+def move_to_layout(pos, old_layout, new_layout):
+    # Same spot on the board after a resize (for cards and animations already placed in pixels)
+    return new_layout.point(*old_layout.to_base(pos))
+
+
+class Assets:
+    # Fonts and sprites (cards, chips) for one layout. Built once per resolution; each sprite is
+    # rendered the first time it is needed and reused until the next resize.
+    def __init__(self, layout, convert_surfaces=False):
+        self.layout = layout
+        self.convert_surfaces = convert_surfaces
+        self.fonts = {name: pygame.font.SysFont("consolas", max(8, round(size * layout.scale)))
+                      for name, size in BASE_FONT_SIZES.items()}
+        self.sprites = {}
+
+    def sprite(self, key, render):
+        # render(key, assets) draws the sprite at this layout's size; called once per key
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = render(key, self)
+            if self.convert_surfaces:
+                sprite = sprite.convert_alpha()
+            self.sprites[key] = sprite
+        return sprite
+
+
+@functools.lru_cache(maxsize=4)
+def get_assets(width, height, convert_surfaces=False):
+    return Assets(get_layout(width, height), convert_surfaces)
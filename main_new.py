@@ -1,7 +1,19 @@
 import pygame
 import sys
-import math
 import random
+import time
+from pi_rules import DEFAULT_RULES, STARTING_COINS, WINNING_COIN_TARGET, create_deck, assign_dealer_pi, settle
+from bet_policy import load_bet_table, suggested_bet
+from shoe_tracker import ShoeTracker
+from render_profile import select_profile, window_size, internal_size, SurfaceCache, AdaptiveFrameCap
+from layout import get_layout, get_assets, move_to_layout
+from snapshot import SnapshotWriter, load_snapshot, encode_session
+from latency import LatencyTracer
+from replay import SessionRecorder
+from chips import ChipPool, draw_chip_stacks
+from metrics import Metrics, start_metrics_server
+from memwatch import MemoryWatch
+from dealer_ai import DealerAI
 
 # Initialize Pygame
 pygame.init()
@@ -9,13 +21,11 @@ pygame.init()
 pygame.key.set_repeat(250, 50) # Enable key repeat: wait 250ms, repeat every 50ms
 
 # Constants
-WIDTH, HEIGHT = 1200, 600
+WIDTH, HEIGHT = 1200, 600 # Starting window size; positions come from the layout (layout.py) for the actual size
 FPS = 60
 TITLE = "PiBlackPiJack"
-THRESHOLD = math.pi * 7  # Bust threshold is now π*7
+RULES = DEFAULT_RULES # Threshold, card values, jokers, dealer stand value and payouts (see pi_rules.Rules)
 ANIMATION_DURATION = 0.5  # Duration for card and chip animations
-STARTING_COINS = 100 # Define starting coins constant
-WINNING_COIN_TARGET = 314
 
 # Colors
 DARK_GREEN = (10, 50, 10)
@@ -30,17 +40,77 @@ RED = (255, 0, 0)
 OVERLAY_COLOR = (0, 0, 0, 180) # Semi-transparent overlay
 GAMEOVER_OVERLAY_COLOR = (0, 0, 0, 220) # More opaque for game over
 
-# Fonts
+# Fonts (scaled to the window; set by apply_display_size)
 pygame.font.init()
-font_large = pygame.font.SysFont("consolas", 40)
-font_medium = pygame.font.SysFont("consolas", 32) # Added for button text maybe
-font_small = pygame.font.SysFont("consolas", 24)
+font_large = None
+font_medium = None # Added for button text maybe
+font_small = None
 
 # Setup display
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
+# The game draws to `screen`: the window itself, or when the window is larger than the profile's
+# internal size (the lowpower profile) a smaller canvas that is scaled to the window once per frame. `layout` holds every position for the screen's size and
+# `assets` the fonts and sprites rendered at that size; both are rebuilt only when the window is resized.
+render_profile = select_profile()
+window_size_px, window_flags = window_size(render_profile, (WIDTH, HEIGHT))
+window = pygame.display.set_mode(window_size_px, window_flags)
 pygame.display.set_caption(TITLE)
+screen = None
+layout = None
+assets = None
+surfaces = SurfaceCache(render_profile) # Cached text/overlay surfaces (converted in the lowpower profile)
+frame_cap = AdaptiveFrameCap(render_profile, FPS)
+latency = LatencyTracer() # Input-to-display latency histograms (PIBJ_LATENCY=1)
+metrics = Metrics() # Cheap counters, served for fleet monitoring when PIBJ_METRICS_PORT is set
+start_metrics_server(metrics)
+memwatch = MemoryWatch() # tracemalloc/RSS/Surface leak tracking for soak runs (PIBJ_MEMWATCH=<seconds>)
+memwatch.add_gauge("text cache", lambda: len(surfaces.texts))
+memwatch.add_gauge("overlay cache", lambda: len(surfaces.overlays))
+memwatch.add_gauge("sprites", lambda: len(assets.sprites))
+dealer_ai = DealerAI(RULES) # Search-based dealer instead of the rule book (PIBJ_DEALER_AI=<ms per decision>)
+memwatch.add_gauge("dealer search table", lambda: len(dealer_ai.table))
 clock = pygame.time.Clock()
 
+def apply_display_size():
+    # Runs at startup and on VIDEORESIZE - never per frame
+    global window, screen, layout, assets, font_large, font_medium, font_small
+    window = pygame.display.get_surface()
+    canvas_size = internal_size(render_profile, window.get_size())
+    if canvas_size == window.get_size():
+        screen = window
+    else:
+        screen = pygame.Surface(canvas_size).convert()
+    old_layout = layout
+    layout = get_layout(*canvas_size)
+    assets = get_assets(*canvas_size, render_profile.convert_surfaces)
+    font_large = assets.fonts["large"]
+    font_medium = assets.fonts["medium"]
+    font_small = assets.fonts["small"]
+    surfaces.clear() # Text rendered with the old fonts
+    if old_layout is not None and old_layout is not layout:
+        # Cards and animations already placed keep their spot on the table
+        for item in player_cards:
+            item["pos"] = move_to_layout(item["pos"], old_layout, layout)
+        dealer_cards[:] = [(move_to_layout(pos, old_layout, layout), card) for pos, card in dealer_cards]
+        for anim in animation_queue + chip_animations + ([active_animation] if active_animation else []):
+            anim.start_pos = move_to_layout(anim.start_pos, old_layout, layout)
+            anim.end_pos = move_to_layout(anim.end_pos, old_layout, layout)
+
+def get_mouse_pos():
+    # Mouse position in screen (canvas) coordinates
+    x, y = pygame.mouse.get_pos()
+    if screen is window:
+        return (x, y)
+    return (x * screen.get_width() // window.get_width(), y * screen.get_height() // window.get_height())
+
+def poll_events():
+    # Input for this frame (export_replay.py feeds recorded events through here instead)
+    return pygame.event.get()
+
+def present_frame():
+    if screen is not window:
+        pygame.transform.scale(screen, window.get_size(), window)
+    pygame.display.flip()
+
 # Betting variables
 player_coins = STARTING_COINS       # Starting coins
 current_bet = 0          # Current bet amount
@@ -56,68 +126,97 @@ active_animation = None
 chip_animations = []     # Queue for chip animations
 round_result = None      # Round result text
 player_pi_input = ""     # Player's input for a PI card
+bet_table = load_bet_table() # Optional bet lookup table from bet_policy.py (None if not generated)
 
 # Lists to hold dealt cards
 player_cards = []  # Each element: {"pos": pos, "card": card}
 dealer_cards = []  # Each element: (pos, card)
 
-# Deck starting position for animations
-deck_pos = (100, 100)
-
-# Predefined dealer target positions for initial deal
-dealer_targets = [(WIDTH // 2 - 150, 130), (WIDTH // 2 - 70, 130)]
-
-# --- Function Definitions (create_deck, calculate_*, CardAnimation, ChipAnimation, etc. - Keep as they are) ---
-def create_deck():
-    deck = []
-    suits = ["♠", "♥", "♦", "♣"]
-    ranks = list(map(str, range(2, 11))) + ["J", "Q", "K", "A"]
-    for suit in suits:
-        for rank in ranks:
-            # Pi value for face cards
-            if rank in ["J", "Q", "K"]:
-                value = math.pi
-            elif rank == "A":
-                # Ace can be 1 or 11 - handle later during calculation if needed, start as 11
-                # For simplicity in this structure, let's keep Ace as 11. Pi Blackjack might not need 1/11 rule.
-                # Revisit if standard Ace rules are desired. For now, fixed value.
-                value = 11 # Or maybe math.e? Let's stick to 11 for now unless Pi theme dictates otherwise.
-            else:
-                value = int(rank)
-            deck.append({"rank": rank, "suit": suit, "value": value, "face_down": False})
-
-    # Add the special PI card (joker) twice. Value is None until assigned.
-    deck.append({"rank": "PI", "suit": "", "value": None, "face_down": False, "joker": True})
-    deck.append({"rank": "PI", "suit": "", "value": None, "face_down": False, "joker": True})
-    random.shuffle(deck)
-    return deck
-
-deck = create_deck()
+apply_display_size()
+
+# --- Function Definitions (calculate_*, CardAnimation, ChipAnimation, etc. - Keep as they are) ---
+# Every card leaves the deck through shoe.draw() so the tracker always knows the remaining composition
+shoe = ShoeTracker(RULES)
+
+shuffle_rng = random.Random() # Deck shuffles only; replay.py seeds it so recorded sessions reshuffle the same way
+
+def new_shoe(reason="round"):
+    # reason is "round", "empty_deck" for the mid-round create_deck fallbacks, or None for the
+    # shoe built at startup, which is not a reshuffle
+    if reason is not None:
+        metrics.reshuffles[reason] += 1
+    fresh_deck = create_deck(RULES, shuffle_rng)
+    shoe.reset(fresh_deck)
+    return fresh_deck
+
+deck = new_shoe(reason=None)
+
+# --- Session snapshots (snapshot.py) ---
+# The state is saved whenever snapshot_key() changes (state transitions, bets, draws, PI values)
+# and restored when the game starts, so a crash or power cut does not lose the player's coins.
+snapshots = SnapshotWriter()
+recorder = SessionRecorder() # Input recording for replays (PIBJ_RECORD=<file>)
+
+def snapshot_key():
+    # Cheap per-frame check for "something worth saving changed"
+    return (game_state, player_coins, current_bet, bet_confirmed, round_result, player_pi_input,
+            len(deck), len(dealer_cards), calculate_player_total())
+
+def session_state():
+    # Cards still being animated are saved as pending, so they are dealt again on restore
+    pending = ([active_animation] if active_animation else []) + animation_queue
+    return {
+        "coins": player_coins, "bet": current_bet, "bet_confirmed": bet_confirmed,
+        "game_state": game_state, "round_result": round_result, "pi_input": player_pi_input,
+        "deck": deck, "player": [item["card"] for item in player_cards], "dealer": [card for pos, card in dealer_cards],
+        "pending": [(anim.destination, anim.card) for anim in pending],
+        "shoe": (shoe.initial, shoe.dealt, shoe.running_count),
+    }
+
+def restore_session(session):
+    global player_coins, current_bet, bet_confirmed, game_state, round_result, player_pi_input
+    global deck, animation_queue, active_animation
+    player_coins = session["coins"]
+    current_bet = session["bet"]
+    bet_confirmed = session["bet_confirmed"]
+    game_state = session["game_state"]
+    round_result = session["round_result"]
+    player_pi_input = session["pi_input"]
+    deck = session["deck"]
+
+    # Cards are placed at their layout targets; pending cards are dealt again from the deck
+    player_hand = session["player"]
+    dealer_hand = session["dealer"]
+    pending = session["pending"]
+    num_player_cards = len(player_hand) + sum(1 for destination, card in pending if destination == "player")
+    player_targets = calculate_player_targets(num_player_cards)
+    player_cards[:] = [{"pos": player_targets[i], "card": card} for i, card in enumerate(player_hand)]
+    dealer_cards[:] = [(calculate_dealer_target(i), card) for i, card in enumerate(dealer_hand)]
+    animation_queue = []
+    active_animation = None
+    release_chip_animations() # A confirmed bet moves on to dealing on the next frame
+    num_player, num_dealer = len(player_hand), len(dealer_hand)
+    for destination, card in pending:
+        if destination == "player":
+            target = player_targets[num_player]
+            num_player += 1
+        else:
+            target = calculate_dealer_target(num_dealer)
+            num_dealer += 1
+        animation_queue.append(CardAnimation(layout.deck_pos, target, ANIMATION_DURATION, destination, card))
+
+    hidden_cards = [card for card in dealer_hand + [card for destination, card in pending] if card.get("face_down", False)]
+    shoe.restore(deck, hidden_cards, *session["shoe"])
+    print(f"Restored session: {game_state}, {player_coins} coins, bet {current_bet}")
+    if game_state == "dealer_turn" and not animation_queue:
+        dealer_turn() # Saved between two dealer decisions
 
 def calculate_player_targets(num_cards):
-    card_width = 60
-    # Adjust spacing based on number of cards to prevent overlap
-    spacing = 15 if num_cards <= 5 else 10 if num_cards <= 7 else 5
-    total_width = num_cards * card_width + (num_cards - 1) * spacing
-    start_x = (WIDTH - total_width) // 2
-    y = HEIGHT - 200 # Player card Y position
-    targets = []
-    for i in range(num_cards):
-        x = start_x + i * (card_width + spacing)
-        targets.append((x, y))
-    return targets
+    return layout.player_targets(num_cards)
 
 def calculate_dealer_target(num_cards_already_present):
-    card_width = 60
-    spacing = 15 # Spacing between dealer cards
-    # Start placing additional cards relative to the last initial card position
-    base_x, base_y = dealer_targets[1] # Position of the second (initially hidden) card
-    # Calculate offset based on how many cards *beyond the initial two* are being added
-    # The first *new* card (index 2) goes one space right, index 3 goes two spaces right etc.
-    card_index = num_cards_already_present # e.g., if 2 cards exist, next is index 2
-    offset_index = card_index - 1 # The first new card (index 2) adds 1 spacing unit offset
-    new_x = base_x + offset_index * (card_width + spacing)
-    return (new_x, base_y)
+    # The next dealer card goes at index num_cards_already_present
+    return layout.dealer_target(num_cards_already_present)
 
 class CardAnimation:
     def __init__(self, start_pos, end_pos, duration, destination, card, face_down_override=None):
@@ -138,20 +237,14 @@ class CardAnimation:
         current_y = self.start_pos[1] + (self.end_pos[1] - self.start_pos[1]) * progress
         return (current_x, current_y), progress >= 1.0
 
-class ChipAnimation:
-    def __init__(self, start_pos, end_pos, duration, amount):
-        self.start_pos = start_pos
-        self.end_pos = end_pos
-        self.duration = duration
-        self.elapsed = 0
-        self.amount = amount # Store amount if needed later (e.g., displaying value during anim)
-    def update(self, dt):
-        self.elapsed += dt
-        progress = min(self.elapsed / self.duration, 1.0)
-        # Simple linear interpolation
-        current_x = self.start_pos[0] + (self.end_pos[0] - self.start_pos[0]) * progress
-        current_y = self.start_pos[1] + (self.end_pos[1] - self.start_pos[1]) * progress
-        return (current_x, current_y), progress >= 1.0
+# Chip stack animations come from a pool (chips.py) and are handed back when they finish
+chip_pool = ChipPool()
+memwatch.add_gauge("pooled chips", lambda: len(chip_pool.free))
+
+def release_chip_animations():
+    for chip in chip_animations:
+        chip_pool.release(chip)
+    chip_animations.clear()
 
 
 # Function to fully reset the game (e.g., after Game Over)
@@ -167,13 +260,14 @@ def reset_game():
 def reset_round():
     global deck, player_cards, dealer_cards, animation_queue, active_animation, game_state, round_result, player_pi_input, current_bet, bet_confirmed
     # Only reset round-specific variables
-    deck = create_deck()
+    deck = new_shoe()
     player_cards.clear()
     dealer_cards.clear()
     # animation_queue.clear() # Clearing here might cancel animations needed for round transition visual? No, needed.
     animation_queue = []
     active_animation = None
-    chip_animations.clear() # Clear any leftover chip anims
+    release_chip_animations() # Clear any leftover chip anims
+    dealer_ai.cancel() # A restart during the dealer's turn drops the decision in progress
     round_result = None
     player_pi_input = ""
     current_bet = 0       # Reset bet amount for the new round
@@ -189,53 +283,34 @@ def add_initial_deal_animations():
     if len(deck) < 4: # Check if enough cards exist
         print("Error: Not enough cards in deck to deal.")
         # Handle this - maybe reshuffle or end game? For now, just print.
-        deck = create_deck() # Simple fix: reset deck if too low
+        deck = new_shoe("empty_deck") # Simple fix: reset deck if too low
 
     initial_player_targets = calculate_player_targets(2)
     # Player Card 1
-    card1 = deck.pop()
-    animation_queue.append(CardAnimation(deck_pos, initial_player_targets[0], ANIMATION_DURATION, "player", card1, face_down_override=False))
+    card1 = shoe.draw(deck)
+    animation_queue.append(CardAnimation(layout.deck_pos, initial_player_targets[0], ANIMATION_DURATION, "player", card1, face_down_override=False))
     # Dealer Card 1 (Face Up)
-    card2 = deck.pop()
-    animation_queue.append(CardAnimation(deck_pos, dealer_targets[0], ANIMATION_DURATION, "dealer", card2, face_down_override=False))
+    card2 = shoe.draw(deck)
+    animation_queue.append(CardAnimation(layout.deck_pos, layout.dealer_targets[0], ANIMATION_DURATION, "dealer", card2, face_down_override=False))
     # Player Card 2
-    card3 = deck.pop()
-    animation_queue.append(CardAnimation(deck_pos, initial_player_targets[1], ANIMATION_DURATION, "player", card3, face_down_override=False))
+    card3 = shoe.draw(deck)
+    animation_queue.append(CardAnimation(layout.deck_pos, initial_player_targets[1], ANIMATION_DURATION, "player", card3, face_down_override=False))
     # Dealer Card 2 (Face Down)
-    card4 = deck.pop()
-    animation_queue.append(CardAnimation(deck_pos, dealer_targets[1], ANIMATION_DURATION, "dealer", card4, face_down_override=True))
+    card4 = shoe.draw(deck, face_down=True)
+    animation_queue.append(CardAnimation(layout.deck_pos, layout.dealer_targets[1], ANIMATION_DURATION, "dealer", card4, face_down_override=True))
 
 
 # Auto-assign value to dealer's PI cards to maximize score without busting if possible
 def auto_assign_dealer_pi():
-    # First pass: calculate total excluding unassigned PI cards
-    current_total = 0
-    pi_card_indices = []
-    for i in range(len(dealer_cards)):
-        pos, card = dealer_cards[i]
-        if card.get("joker", False) and card["value"] is None and not card.get("face_down", False):
-            pi_card_indices.append(i)
-        elif not card.get("face_down", False):
-            current_total += card["value"] if card["value"] is not None else 0
-
-    # Assign values to PI cards
-    for index in pi_card_indices:
-        pos, card = dealer_cards[index]
-        # Try to get as close to THRESHOLD as possible without busting
-        needed = THRESHOLD - current_total
-        # Choose a value: simple strategy - aim for threshold, default to 1 if that busts or is <= 0
-        # More complex logic could go here (e.g., based on player's hand)
-        assign_val = needed
-        if assign_val <= 0 or current_total + assign_val > THRESHOLD:
-             assign_val = 1 # Assign a minimal value if aiming for threshold busts or is non-positive
-
-        # Check if assigning 1 still busts (only possible if current_total is already >= THRESHOLD)
-        if current_total + 1 > THRESHOLD:
-             assign_val = 1 # Or perhaps assign 0? Let's stick to 1 for simplicity.
-
-        card["value"] = assign_val
-        print(f"Dealer auto-assigned PI card value: {assign_val}")
-        current_total += assign_val
+    # Only visible cards count; the assignment rule itself lives in pi_rules so the
+    # analysis tools (dealer_odds.py) follow exactly the same policy
+    visible_cards = [card for pos, card in dealer_cards if not card.get("face_down", False)]
+    assigned_values = assign_dealer_pi([card["value"] for card in visible_cards], RULES)
+    for card, assign_val in zip(visible_cards, assigned_values):
+        if card.get("joker", False) and card["value"] is None:
+            card["value"] = assign_val
+            metrics.pi_assignments["dealer"] += 1
+            print(f"Dealer auto-assigned PI card value: {assign_val}")
 
 # --- Drawing Functions (Keep most as they are) ---
 def draw_background():
@@ -248,138 +323,135 @@ def draw_background():
     #         screen.blit(pi_text, (100 + i * 100, 80 + j * 100))
 
 def draw_menu_icon():
-    menu_rect = pygame.Rect(30, 30, 40, 30)
-    pygame.draw.rect(screen, PURPLE, menu_rect, border_radius=4)
-    for i in range(3):
-        pygame.draw.line(screen, WHITE, (35, 38 + i * 8), (65, 38 + i * 8), 4)
+    menu_rect = layout.menu_icon_rect
+    pygame.draw.rect(screen, PURPLE, menu_rect, border_radius=layout.px(4))
+    for start, end in layout.menu_icon_lines:
+        pygame.draw.line(screen, WHITE, start, end, layout.menu_icon_line_width)
     return menu_rect
 
 def draw_dealer_cards_placeholders():
     # Only draw if no cards are present or being animated for dealer yet?
     # Or always draw behind? Let's draw if len(dealer_cards) < 2
     if len(dealer_cards) < 2 and not any(anim.destination == 'dealer' for anim in animation_queue + ([active_animation] if active_animation else [])):
-        for pos in dealer_targets:
-            bg_rect = pygame.Rect(pos[0], pos[1], 60, 90)
-            pygame.draw.rect(screen, (0, 80, 0), bg_rect, border_radius=5) # Darker placeholder
+        for pos in layout.dealer_targets:
+            bg_rect = pygame.Rect(pos, layout.card_size)
+            pygame.draw.rect(screen, (0, 80, 0), bg_rect, border_radius=layout.card_radius) # Darker placeholder
 
 def draw_player_cards_placeholders():
      # Draw if player has no cards and none are animating towards player
     if not player_cards and not any(anim.destination == 'player' for anim in animation_queue + ([active_animation] if active_animation else [])):
         targets = calculate_player_targets(2)
         for pos in targets:
-            bg_rect = pygame.Rect(pos[0], pos[1], 60, 90)
-            pygame.draw.rect(screen, (50, 50, 50), bg_rect, 2, border_radius=5) # Outline placeholder
+            bg_rect = pygame.Rect(pos, layout.card_size)
+            pygame.draw.rect(screen, (50, 50, 50), bg_rect, layout.card_border, border_radius=layout.card_radius) # Outline placeholder
 
 def draw_totals(player_total, dealer_total):
     # Player's total.
-    player_label = font_large.render("YOUR TOTAL:", True, YELLOW)
-    screen.blit(player_label, (50, HEIGHT // 2 - 120))
-    player_circle_center = (200, HEIGHT // 2 - 20)
-    pygame.draw.circle(screen, PINK, player_circle_center, 40)
-    pygame.draw.circle(screen, NEON_BLUE, player_circle_center, 44, 4)
-    player_total_text = font_large.render(f"{player_total:.2f}", True, BLACK) # Format to 2 decimals
+    player_label = surfaces.text(font_large, "YOUR TOTAL:", YELLOW)
+    screen.blit(player_label, layout.player_label_pos)
+    player_circle_center = layout.player_circle_center
+    pygame.draw.circle(screen, PINK, player_circle_center, layout.total_radius)
+    pygame.draw.circle(screen, NEON_BLUE, player_circle_center, layout.total_ring_radius, layout.total_ring_width)
+    player_total_text = surfaces.text(font_large, f"{player_total:.2f}", BLACK) # Format to 2 decimals
     player_rect = player_total_text.get_rect(center=player_circle_center)
     screen.blit(player_total_text, player_rect)
     # Show player's PI input if needed.
     if is_pi_input_required(): # Check if input is currently needed
-        input_prompt_y = player_circle_center[1] + 60
-        input_text = font_small.render("Enter PI value: " + player_pi_input, True, WHITE)
-        input_rect = input_text.get_rect(center=(player_circle_center[0], input_prompt_y))
+        input_text = surfaces.text(font_small, "Enter PI value: " + player_pi_input, WHITE)
+        input_rect = input_text.get_rect(center=layout.pi_prompt_center)
         # Draw a small background box for the input prompt
-        prompt_bg_rect = input_rect.inflate(10, 5)
+        prompt_bg_rect = input_rect.inflate(layout.pi_prompt_padding)
         prompt_bg_rect.center = input_rect.center
-        pygame.draw.rect(screen, BLACK, prompt_bg_rect, border_radius=4)
-        pygame.draw.rect(screen, NEON_BLUE, prompt_bg_rect, 1, border_radius=4)
+        pygame.draw.rect(screen, BLACK, prompt_bg_rect, border_radius=layout.px(4))
+        pygame.draw.rect(screen, NEON_BLUE, prompt_bg_rect, 1, border_radius=layout.px(4))
         screen.blit(input_text, input_rect)
 
 
     # Dealer's total.
-    dealer_label = font_large.render("DEALER TOTAL:", True, YELLOW)
-    screen.blit(dealer_label, (WIDTH - 350, HEIGHT // 2 - 120))
-    dealer_circle_center = (WIDTH - 200, HEIGHT // 2 - 20)
-    pygame.draw.circle(screen, PINK, dealer_circle_center, 40)
-    pygame.draw.circle(screen, NEON_BLUE, dealer_circle_center, 44, 4)
+    dealer_label = surfaces.text(font_large, "DEALER TOTAL:", YELLOW)
+    screen.blit(dealer_label, layout.dealer_label_pos)
+    dealer_circle_center = layout.dealer_circle_center
+    pygame.draw.circle(screen, PINK, dealer_circle_center, layout.total_radius)
+    pygame.draw.circle(screen, NEON_BLUE, dealer_circle_center, layout.total_ring_radius, layout.total_ring_width)
     # Format to 2 decimals
-    dealer_total_text = font_large.render(f"{dealer_total:.2f}", True, BLACK)
+    dealer_total_text = surfaces.text(font_large, f"{dealer_total:.2f}", BLACK)
     dealer_rect = dealer_total_text.get_rect(center=dealer_circle_center)
     screen.blit(dealer_total_text, dealer_rect)
 
 
 def draw_betting_overlay(mouse_pos):
-    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    overlay.fill(OVERLAY_COLOR)
+    overlay = surfaces.overlay(layout.screen_rect.size, OVERLAY_COLOR)
     screen.blit(overlay, (0, 0))
 
-    bet_text = font_large.render("Place Your Bet", True, YELLOW)
-    text_rect = bet_text.get_rect(center=(WIDTH//2, HEIGHT//2 - 180)) # Moved up slightly
+    bet_text = surfaces.text(font_large, "Place Your Bet", YELLOW)
+    text_rect = bet_text.get_rect(center=layout.bet_title_center) # Moved up slightly
     screen.blit(bet_text, text_rect)
 
     # Display Winning Condition
-    win_condition_text = font_small.render(f"Reach {WINNING_COIN_TARGET} π coins to Win!", True, CYAN)
-    win_rect = win_condition_text.get_rect(center=(WIDTH//2, HEIGHT//2 - 130)) # Below title
+    win_condition_text = surfaces.text(font_small, f"Reach {WINNING_COIN_TARGET} π coins to Win!", CYAN)
+    win_rect = win_condition_text.get_rect(center=layout.bet_win_condition_center) # Below title
     screen.blit(win_condition_text, win_rect)
 
-    coins_text = font_small.render(f"Coins: {player_coins}", True, WHITE)
-    coins_rect = coins_text.get_rect(center=(WIDTH//2, HEIGHT//2 - 80)) # Adjusted Y
+    coins_text = surfaces.text(font_small, f"Coins: {player_coins}", WHITE)
+    coins_rect = coins_text.get_rect(center=layout.bet_coins_center) # Adjusted Y
     screen.blit(coins_text, coins_rect)
 
-    current_bet_text = font_small.render(f"Current Bet: {current_bet}", True, WHITE)
-    bet_rect = current_bet_text.get_rect(center=(WIDTH//2, HEIGHT//2 - 40)) # Adjusted Y
+    bet_line = f"Current Bet: {current_bet}"
+    if bet_table is not None and player_coins > 0:
+        bet_line += f"   (Suggested: {suggested_bet(bet_table, player_coins)})"
+    current_bet_text = surfaces.text(font_small, bet_line, WHITE)
+    bet_rect = current_bet_text.get_rect(center=layout.bet_amount_center) # Adjusted Y
     screen.blit(current_bet_text, bet_rect)
 
-    instructions = font_small.render("UP/DOWN arrows to adjust bet, ENTER to confirm", True, WHITE)
-    inst_rect = instructions.get_rect(center=(WIDTH//2, HEIGHT//2 + 10)) # Adjusted Y
+    instructions = surfaces.text(font_small, "UP/DOWN arrows to adjust bet, ENTER to confirm", WHITE)
+    inst_rect = instructions.get_rect(center=layout.bet_instructions_center) # Adjusted Y
     screen.blit(instructions, inst_rect)
 
     # All-In Button
-    all_in_rect = pygame.Rect(WIDTH // 2 - 90, HEIGHT // 2 + 60, 180, 50) # Adjusted Y
+    all_in_rect = layout.all_in_rect
     all_in_color = RED if all_in_rect.collidepoint(mouse_pos) else (200, 0, 0)
     if player_coins <= 0: all_in_color = (100, 100, 100) # Greyed out
-    pygame.draw.rect(screen, all_in_color, all_in_rect, border_radius=10)
-    all_in_text = font_medium.render("ALL IN", True, WHITE)
+    pygame.draw.rect(screen, all_in_color, all_in_rect, border_radius=layout.px(10))
+    all_in_text = surfaces.text(font_medium, "ALL IN", WHITE)
     all_in_text_rect = all_in_text.get_rect(center=all_in_rect.center)
     screen.blit(all_in_text, all_in_text_rect)
 
     return all_in_rect # Return the rect for click detection
 
 def draw_game_won_screen():
-    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 100, 0, 220)) # Greenish overlay for winning
+    overlay = surfaces.overlay(layout.screen_rect.size, (0, 100, 0, 220)) # Greenish overlay for winning
     screen.blit(overlay, (0, 0))
 
-    title_text = font_large.render("YOU WIN!", True, YELLOW)
-    title_rect = title_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 80))
+    title_text = surfaces.text(font_large, "YOU WIN!", YELLOW)
+    title_rect = title_text.get_rect(center=layout.game_won_title_center)
     screen.blit(title_text, title_rect)
 
-    congrats_text = font_medium.render("Congratulations!", True, WHITE)
-    congrats_rect = congrats_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 20))
+    congrats_text = surfaces.text(font_medium, "Congratulations!", WHITE)
+    congrats_rect = congrats_text.get_rect(center=layout.game_won_congrats_center)
     screen.blit(congrats_text, congrats_rect)
 
-    reason_text = font_small.render(f"You reached {player_coins} π coins!", True, WHITE)
-    reason_rect = reason_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 + 20))
+    reason_text = surfaces.text(font_small, f"You reached {player_coins} π coins!", WHITE)
+    reason_rect = reason_text.get_rect(center=layout.game_won_reason_center)
     screen.blit(reason_text, reason_rect)
 
-    restart_text = font_medium.render("Press R to Play Again", True, YELLOW)
-    restart_rect = restart_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 + 80))
+    restart_text = surfaces.text(font_medium, "Press R to Play Again", YELLOW)
+    restart_rect = restart_text.get_rect(center=layout.game_won_restart_center)
     screen.blit(restart_text, restart_rect)
 
 
 
 def draw_coin_total():
-    coin_text = font_small.render(f"Coins: {player_coins}", True, WHITE)
+    coin_text = surfaces.text(font_small, f"Coins: {player_coins}", WHITE)
     # Position bottom-left
-    screen.blit(coin_text, (10, HEIGHT - 30))
+    screen.blit(coin_text, layout.coin_total_pos)
     # Also show current bet if > 0 and not in betting phase explicitly
     if current_bet > 0 and game_state != "betting":
-        bet_display_text = font_small.render(f"Bet: {current_bet}", True, YELLOW)
-        screen.blit(bet_display_text, (150, HEIGHT - 30))
+        bet_display_text = surfaces.text(font_small, f"Bet: {current_bet}", YELLOW)
+        screen.blit(bet_display_text, layout.bet_display_pos)
 
-def draw_chip(pos):
-    pygame.draw.circle(screen, YELLOW, pos, 15) # Outer circle
-    pygame.draw.circle(screen, BLACK, pos, 13) # Inner circle
-    chip_text = font_small.render("π", True, YELLOW) # Pi symbol
-    chip_rect = chip_text.get_rect(center=pos)
-    screen.blit(chip_text, chip_rect)
+def draw_chip(chip, pos):
+    # The bet as stacks of chips (pre-rendered sprites, see chips.py)
+    draw_chip_stacks(screen, assets, chip, pos)
 
 # No longer needed - incorporated into draw_totals
 # def draw_pi_input_box():
@@ -395,34 +467,30 @@ def is_pi_input_required():
 
 # --- Menu/Overlay Functions (Keep draw_menu_overlay, draw_restart_confirmation_overlay, draw_round_result) ---
 def draw_menu_overlay():
-    overlay_width, overlay_height = 400, 300
-    overlay_x, overlay_y = 50, 50 # Position from top-left
-    overlay = pygame.Surface((overlay_width, overlay_height), pygame.SRCALPHA)
-    overlay.fill((50, 50, 50, 240)) # Dark semi-transparent background
-    screen.blit(overlay, (overlay_x, overlay_y))
+    menu_rect = layout.menu_rect
+    overlay = surfaces.overlay(menu_rect.size, (50, 50, 50, 240)) # Dark semi-transparent background
+    screen.blit(overlay, menu_rect.topleft)
 
     # Simple Title
-    title_text = font_medium.render("Menu", True, WHITE)
-    title_rect = title_text.get_rect(center=(overlay_x + overlay_width // 2, overlay_y + 40))
+    title_text = surfaces.text(font_medium, "Menu", WHITE)
+    title_rect = title_text.get_rect(center=layout.menu_title_center)
     screen.blit(title_text, title_rect)
 
     # Options (adjust positions relative to overlay_x, overlay_y)
-    home_text = font_large.render("Home", True, WHITE) # Home might quit or go to title screen TBD
-    restart_text = font_large.render("Restart", True, WHITE)
+    home_text = surfaces.text(font_large, "Home", WHITE) # Home might quit or go to title screen TBD
+    restart_text = surfaces.text(font_large, "Restart", WHITE)
     # Options might control sound, speed, etc. TBD
-    options_text = font_large.render("Options", True, WHITE)
+    options_text = surfaces.text(font_large, "Options", WHITE)
 
-    base_y = overlay_y + 90
-    spacing = 70
-    home_rect = home_text.get_rect(topleft=(overlay_x + 50, base_y))
-    restart_rect = restart_text.get_rect(topleft=(overlay_x + 50, base_y + spacing))
-    options_rect = options_text.get_rect(topleft=(overlay_x + 50, base_y + 2 * spacing))
+    home_rect = home_text.get_rect(topleft=layout.menu_option_pos[0])
+    restart_rect = restart_text.get_rect(topleft=layout.menu_option_pos[1])
+    options_rect = options_text.get_rect(topleft=layout.menu_option_pos[2])
 
     # Basic Hover Effect (Optional)
-    mouse_pos = pygame.mouse.get_pos()
-    if home_rect.collidepoint(mouse_pos): pygame.draw.rect(screen, PURPLE, home_rect.inflate(10, 2), 1)
-    if restart_rect.collidepoint(mouse_pos): pygame.draw.rect(screen, PURPLE, restart_rect.inflate(10, 2), 1)
-    if options_rect.collidepoint(mouse_pos): pygame.draw.rect(screen, PURPLE, options_rect.inflate(10, 2), 1)
+    mouse_pos = get_mouse_pos()
+    if home_rect.collidepoint(mouse_pos): pygame.draw.rect(screen, PURPLE, home_rect.inflate(layout.menu_hover_inflate), 1)
+    if restart_rect.collidepoint(mouse_pos): pygame.draw.rect(screen, PURPLE, restart_rect.inflate(layout.menu_hover_inflate), 1)
+    if options_rect.collidepoint(mouse_pos): pygame.draw.rect(screen, PURPLE, options_rect.inflate(layout.menu_hover_inflate), 1)
 
     screen.blit(home_text, home_rect)
     screen.blit(restart_text, restart_rect)
@@ -432,48 +500,45 @@ def draw_menu_overlay():
 
 
 def draw_restart_confirmation_overlay():
-    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    overlay.fill(OVERLAY_COLOR) # Use semi-transparent overlay
+    overlay = surfaces.overlay(layout.screen_rect.size, OVERLAY_COLOR) # Use semi-transparent overlay
     screen.blit(overlay, (0, 0))
-    confirm_text = font_large.render("Confirm Restart? (Y / N)", True, WHITE)
-    text_rect = confirm_text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
+    confirm_text = surfaces.text(font_large, "Confirm Restart? (Y / N)", WHITE)
+    text_rect = confirm_text.get_rect(center=layout.restart_confirm_center)
     screen.blit(confirm_text, text_rect)
 
 
 def draw_round_result(result_text):
-    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 200)) # Darker overlay for results
+    overlay = surfaces.overlay(layout.screen_rect.size, (0, 0, 0, 200)) # Darker overlay for results
     screen.blit(overlay, (0, 0))
 
-    result_render = font_large.render(result_text, True, YELLOW)
-    result_rect = result_render.get_rect(center=(WIDTH//2, HEIGHT//2 - 50))
+    result_render = surfaces.text(font_large, result_text, YELLOW)
+    result_rect = result_render.get_rect(center=layout.result_center)
     screen.blit(result_render, result_rect)
 
     # Check if game is over due to coins
     if player_coins <= 0:
-        prompt = font_small.render("Game Over! Press R to Restart", True, WHITE)
+        prompt = surfaces.text(font_small, "Game Over! Press R to Restart", WHITE)
     else:
-        prompt = font_small.render("Press SPACE to start next round", True, WHITE)
+        prompt = surfaces.text(font_small, "Press SPACE to start next round", WHITE)
 
-    prompt_rect = prompt.get_rect(center=(WIDTH//2, HEIGHT//2 + 20))
+    prompt_rect = prompt.get_rect(center=layout.result_prompt_center)
     screen.blit(prompt, prompt_rect)
 
 # New Game Over Screen function
 def draw_game_over_screen():
-    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    overlay.fill(GAMEOVER_OVERLAY_COLOR) # Use the more opaque overlay
+    overlay = surfaces.overlay(layout.screen_rect.size, GAMEOVER_OVERLAY_COLOR) # Use the more opaque overlay
     screen.blit(overlay, (0, 0))
 
-    title_text = font_large.render("GAME OVER", True, RED)
-    title_rect = title_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 60))
+    title_text = surfaces.text(font_large, "GAME OVER", RED)
+    title_rect = title_text.get_rect(center=layout.game_over_title_center)
     screen.blit(title_text, title_rect)
 
-    reason_text = font_small.render("You ran out of π coins!", True, WHITE)
-    reason_rect = reason_text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
+    reason_text = surfaces.text(font_small, "You ran out of π coins!", WHITE)
+    reason_rect = reason_text.get_rect(center=layout.game_over_reason_center)
     screen.blit(reason_text, reason_rect)
 
-    restart_text = font_medium.render("Press R to Restart", True, YELLOW)
-    restart_rect = restart_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 + 60))
+    restart_text = surfaces.text(font_medium, "Press R to Restart", YELLOW)
+    restart_rect = restart_text.get_rect(center=layout.game_over_restart_center)
     screen.blit(restart_text, restart_rect)
 
 
@@ -514,26 +579,12 @@ def calculate_dealer_total(reveal_all=False):
 
 # --- Card Drawing (Keep as is) ---
 def draw_card(card, pos):
-    card_width, card_height = 60, 90
-    card_rect = pygame.Rect(pos[0], pos[1], card_width, card_height)
-    border_radius = 5
-
+    # Cards are pre-rendered sprites at the current layout size (see render_card_sprite)
     if card.get("face_down", False):
-        # Draw face down card (e.g., purple with outline)
-        pygame.draw.rect(screen, PURPLE, card_rect, border_radius=border_radius)
-        pygame.draw.rect(screen, NEON_BLUE, card_rect, 2, border_radius=border_radius)
-        # Optional: Add a symbol like π to the back
-        pi_text = font_large.render("π", True, WHITE)
-        pi_rect = pi_text.get_rect(center=card_rect.center)
-        screen.blit(pi_text, pi_rect)
+        key = ("card_back",)
     else:
-        # Draw face up card
-        pygame.draw.rect(screen, WHITE, card_rect, border_radius=border_radius) # White background
-        pygame.draw.rect(screen, BLACK, card_rect, 1, border_radius=border_radius) # Thin black border
-
         rank = card["rank"]
         suit = card["suit"]
-        value = card["value"] # Get assigned value for display?
 
         # Determine text color (Red for Hearts/Diamonds, Black otherwise)
         text_color = RED if suit in ["♥", "♦"] else BLACK
@@ -546,23 +597,38 @@ def draw_card(card, pos):
             text_color = PURPLE # Make PI card purple text
         else:
             display_text = rank # Just show rank J, Q, K, A, 2-10
+        key = ("card", display_text, suit, text_color)
+    screen.blit(assets.sprite(key, render_card_sprite), pos)
+
+def render_card_sprite(key, sprite_assets):
+    sprite_layout = sprite_assets.layout
+    card_rect = pygame.Rect((0, 0), sprite_layout.card_size)
+    sprite = pygame.Surface(card_rect.size, pygame.SRCALPHA)
+    border_radius = sprite_layout.card_radius
+
+    if key[0] == "card_back":
+        # Draw face down card (e.g., purple with outline)
+        pygame.draw.rect(sprite, PURPLE, card_rect, border_radius=border_radius)
+        pygame.draw.rect(sprite, NEON_BLUE, card_rect, sprite_layout.card_border, border_radius=border_radius)
+        # Optional: Add a symbol like π to the back
+        pi_text = sprite_assets.fonts["large"].render("π", True, WHITE)
+        pi_rect = pi_text.get_rect(center=card_rect.center)
+        sprite.blit(pi_text, pi_rect)
+    else:
+        # Draw face up card
+        _, display_text, suit, text_color = key
+        pygame.draw.rect(sprite, WHITE, card_rect, border_radius=border_radius) # White background
+        pygame.draw.rect(sprite, BLACK, card_rect, 1, border_radius=border_radius) # Thin black border
 
         # Render Rank/Suit
-        rank_font = font_small # Font for rank/suit
+        rank_font = sprite_assets.fonts["small"] # Font for rank/suit
         rank_surf = rank_font.render(display_text, True, text_color)
         suit_surf = rank_font.render(suit, True, text_color)
 
-        # Position rank/suit (top-left and bottom-right corners)
-        screen.blit(rank_surf, (card_rect.left + 5, card_rect.top + 5))
-        screen.blit(suit_surf, (card_rect.left + 5, card_rect.top + 20))
-
-        # Optional: Draw rotated text on bottom right? More complex. Stick to top-left.
-
-        # Optional: Draw simple representation in center (e.g., just rank for number cards)
-        # center_font = font_large
-        # center_surf = center_font.render(rank, True, text_color)
-        # center_rect = center_surf.get_rect(center=card_rect.center)
-        # screen.blit(center_surf, center_rect)
+        # Position rank/suit (top-left corner)
+        sprite.blit(rank_surf, sprite_layout.card_rank_offset)
+        sprite.blit(suit_surf, sprite_layout.card_suit_offset)
+    return sprite
 
 
 def draw_all_cards():
@@ -577,48 +643,77 @@ def draw_all_cards():
 
 def dealer_turn():
     print("Dealer's turn begins.")
-    global deck, dealer_cards, game_state, animation_queue, player_cards
+    global game_state
     # --- Keep the reveal logic and PI assignment as is ---
-    revealed_card = False
     for i in range(len(dealer_cards)):
         pos, card = dealer_cards[i]
         if card.get("face_down", False):
             card["face_down"] = False
-            revealed_card = True
+            shoe.reveal(card)
             print(f"Dealer reveals: {card['rank']}{card['suit']}")
             break
+    game_state = "dealer_turn" # Explicitly ensure state is correct
+    if dealer_ai.enabled:
+        # The search dealer thinks in its worker thread; apply_dealer_ai_move() plays the move
+        # once it is ready, so the frames keep coming meanwhile
+        visible_cards = [card for pos, card in dealer_cards if not card.get("face_down", False)]
+        dealer_ai.think([card["value"] for card in visible_cards], shoe.composition(), calculate_player_total())
+        return
+
     auto_assign_dealer_pi()
     dealer_total = calculate_dealer_total(reveal_all=True)
     print(f"Dealer total (after reveal/PI): {dealer_total:.2f}")
 
     # --- Modify the hitting logic ---
-    while dealer_total < 17:
-        print("Dealer hits.")
-        if not deck:
-            print("Error: Deck empty during dealer turn. Reshuffling.")
-            deck = create_deck() # Reshuffle if empty
-            if not deck: # Still empty? Major issue.
-               print("FATAL ERROR: Deck empty even after reshuffle.")
-               # Handle this fatal error appropriately - maybe end game?
-               game_state = "game_over" # Or some error state
-               return
-
-
-        new_card = deck.pop()
-        new_target = calculate_dealer_target(len(dealer_cards))
-        animation_queue.append(CardAnimation(deck_pos, new_target, ANIMATION_DURATION, "dealer", new_card, face_down_override=False))
-
-        # ***** CHANGE HERE *****
-        # Keep the state as dealer_turn and return to let animation play.
-        # The main loop will call dealer_turn() again after the animation.
-        game_state = "dealer_turn" # Explicitly ensure state is correct
+    if dealer_total < RULES.dealer_stand:
+        dealer_hit()
         return # MUST return here to allow animation to play
 
-    # --- This part runs ONLY if the while loop condition (dealer_total < 17) is FALSE ---
-    # Dealer stands (total >= 17)
+    # --- This part runs ONLY if dealer_total >= RULES.dealer_stand ---
+    dealer_stands(dealer_total)
+
+def dealer_hit():
+    global deck, game_state
+    print("Dealer hits.")
+    if not deck:
+        print("Error: Deck empty during dealer turn. Reshuffling.")
+        deck = new_shoe("empty_deck") # Reshuffle if empty
+        if not deck: # Still empty? Major issue.
+           print("FATAL ERROR: Deck empty even after reshuffle.")
+           # Handle this fatal error appropriately - maybe end game?
+           game_state = "game_over" # Or some error state
+           return
+
+    new_card = shoe.draw(deck)
+    new_target = calculate_dealer_target(len(dealer_cards))
+    animation_queue.append(CardAnimation(layout.deck_pos, new_target, ANIMATION_DURATION, "dealer", new_card, face_down_override=False))
+
+    # Keep the state as dealer_turn and return to let animation play.
+    # The main loop will call dealer_turn() again after the animation.
+    game_state = "dealer_turn"
+
+def dealer_stands(dealer_total):
+    global game_state
     print(f"Dealer stands with total: {dealer_total:.2f}")
     game_state = "round_end" # Transition to round end
     determine_winner() # Determine winner now
+
+def apply_dealer_ai_move():
+    # Called every frame of the dealer's turn; does nothing until the search dealer has decided
+    move = dealer_ai.poll()
+    if move is None:
+        return
+    pi_values, hit = move
+    unassigned = [card for pos, card in dealer_cards
+                  if not card.get("face_down", False) and card.get("joker", False) and card["value"] is None]
+    for card, assign_val in zip(unassigned, pi_values):
+        card["value"] = assign_val
+        metrics.pi_assignments["dealer"] += 1
+        print(f"Dealer AI assigned PI card value: {assign_val}")
+    if hit:
+        dealer_hit()
+    else:
+        dealer_stands(calculate_dealer_total(reveal_all=True))
     
 # Modified determine_winner to check for win condition
 def determine_winner():
@@ -627,26 +722,11 @@ def determine_winner():
     dealer_total = calculate_dealer_total(reveal_all=True)
 
     print(f"Determining winner: Player={player_total:.2f}, Dealer={dealer_total:.2f}")
-    payout_multiplier = 0 # 0 for loss, 1 for push, 2 for win
-
-    if player_total > THRESHOLD:
-        round_result = "Player Busts! Dealer Wins!"
-        payout_multiplier = 0
-    elif dealer_total > THRESHOLD:
-        round_result = "Dealer Busts! Player Wins!"
-        payout_multiplier = 2
-    elif player_total > dealer_total:
-        round_result = "Player Wins!"
-        payout_multiplier = 2
-    elif dealer_total > player_total:
-        round_result = "Dealer Wins!"
-        payout_multiplier = 0
-    else: # Tie (Push)
-        round_result = "Push! It's a Tie!"
-        payout_multiplier = 1
+    round_result, payout_multiplier = settle(player_total, dealer_total, RULES)
 
     # Calculate new coin total
     player_coins += current_bet * payout_multiplier
+    metrics.round_settled(current_bet, payout_multiplier, RULES)
     print(f"Round Result: {round_result}. Player Coins: {player_coins}")
 
     # --- Check for Win/Loss Conditions AFTER payout ---
@@ -667,13 +747,8 @@ def determine_winner():
 def draw_buttons(mouse_pos, mouse_click, buttons_active):
     global game_state, player_cards, deck # Added globals
 
-    button_width, button_height = 180, 60
-    button_y = HEIGHT - 100 # Y position for both buttons
-    hit_x = WIDTH // 4 - button_width // 2 # Position Hit button left-center
-    stand_x = 3 * WIDTH // 4 - button_width // 2 # Position Stand button right-center
-
-    hit_rect = pygame.Rect(hit_x, button_y, button_width, button_height)
-    stand_rect = pygame.Rect(stand_x, button_y, button_width, button_height)
+    hit_rect = layout.hit_rect # Hit button left-center
+    stand_rect = layout.stand_rect # Stand button right-center
 
     # Define colors based on active state and hover
     hit_base_color = PINK
@@ -693,14 +768,14 @@ def draw_buttons(mouse_pos, mouse_click, buttons_active):
         stand_color = stand_inactive_color
 
     # Draw Hit Button
-    pygame.draw.rect(screen, hit_color, hit_rect, border_radius=12)
-    hit_text = font_large.render("HIT", True, BLACK)
+    pygame.draw.rect(screen, hit_color, hit_rect, border_radius=layout.button_radius)
+    hit_text = surfaces.text(font_large, "HIT", BLACK)
     hit_text_rect = hit_text.get_rect(center=hit_rect.center)
     screen.blit(hit_text, hit_text_rect)
 
     # Draw Stand Button
-    pygame.draw.rect(screen, stand_color, stand_rect, border_radius=12)
-    stand_text = font_large.render("STAND", True, YELLOW)
+    pygame.draw.rect(screen, stand_color, stand_rect, border_radius=layout.button_radius)
+    stand_text = surfaces.text(font_large, "STAND", YELLOW)
     stand_text_rect = stand_text.get_rect(center=stand_rect.center)
     screen.blit(stand_text, stand_text_rect)
 
@@ -712,9 +787,9 @@ def draw_buttons(mouse_pos, mouse_click, buttons_active):
                 # --- Hit Logic ---
                 if not deck:
                     print("Error: Deck empty when hitting.")
-                    deck = create_deck() # Reshuffle
+                    deck = new_shoe("empty_deck") # Reshuffle
 
-                new_card = deck.pop()
+                new_card = shoe.draw(deck)
                 # Recalculate targets to potentially make space
                 new_targets = calculate_player_targets(len(player_cards) + 1)
                 # Update existing card positions smoothly? Or just snap? Let's snap for simplicity.
@@ -722,8 +797,9 @@ def draw_buttons(mouse_pos, mouse_click, buttons_active):
                     player_cards[i]["pos"] = new_targets[i]
 
                 # Add animation for the new card
-                animation_queue.append(CardAnimation(deck_pos, new_targets[-1], ANIMATION_DURATION, "player", new_card, face_down_override=False))
+                animation_queue.append(CardAnimation(layout.deck_pos, new_targets[-1], ANIMATION_DURATION, "player", new_card, face_down_override=False))
                 game_state = "dealing" # Process the card animation
+                latency.changed("hit", next_frame=True) # Hands were already drawn this frame
                 print("Player hits, dealing card.")
 
         elif stand_rect.collidepoint(mouse_pos):
@@ -731,6 +807,7 @@ def draw_buttons(mouse_pos, mouse_click, buttons_active):
             if game_state == "idle":
                 # --- Stand Logic ---
                 game_state = "dealer_turn" # Transition to dealer's turn
+                latency.changed("stand", next_frame=True)
                 dealer_turn() # Start the dealer's logic (reveal card, then potentially hit)
                 print("Player stands. Dealer's turn.")
 
@@ -748,15 +825,29 @@ def main():
     running = True
     all_in_button_rect = None # To store the rect from the drawing function
 
+    session = load_snapshot(rules=RULES)
+    if session is not None:
+        restore_session(session)
+    last_snapshot_key = snapshot_key()
+    recorder.start(encode_session(session_state()), shuffle_rng)
+
     while running:
-        dt = clock.tick(FPS) / 1000.0 # Delta time in seconds
-        mouse_pos = pygame.mouse.get_pos()
+        dt_ms = clock.tick(frame_cap.fps)
+        dealer_ai.frame_started() # The search dealer's worker sits out this frame's work
+        dt = dt_ms / 1000.0 # Delta time in seconds
+        frame_start = time.perf_counter() # Work per frame (excluding the tick wait) drives the adaptive FPS cap
+        mouse_pos = get_mouse_pos()
         mouse_click = False # Reset mouse click status each frame
 
         # --- Event Handling ---
-        for event in pygame.event.get():
+        events = poll_events()
+        latency.poll(events) # Inputs are stamped when SDL is polled
+        recorder.record(dt_ms, events, layout.to_base(mouse_pos), game_state)
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
+            if event.type == pygame.VIDEORESIZE:
+                apply_display_size() # Rebuild layout and scaled assets for the new size
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1: # Left mouse button
                     mouse_click = True
@@ -770,45 +861,52 @@ def main():
                         restart_confirmation = False
                         menu_overlay_active = False
                         reset_game() # Full reset
+                        latency.changed("restart")
                     elif event.key == pygame.K_n:
                         print("Restart cancelled")
                         restart_confirmation = False
+                        latency.changed("restart")
                         # menu_overlay_active = False # Keep menu closed maybe?
                 # Game Over Restart
                 elif game_state == "game_over":
                     if event.key == pygame.K_r:
                         print("Restarting game from Game Over screen.")
                         reset_game() # Full reset
+                        latency.changed("restart")
                 # Add handler for Game Won state
                 elif game_state == "game_won":
                     if event.key == pygame.K_r:
                         print("Restarting game from Win Screen.")
                         reset_game() # Full reset
+                        latency.changed("restart")
 
                 # Betting State Input
                 elif game_state == "betting":
                     if event.key == pygame.K_UP:
                         if current_bet < player_coins:
                             current_bet += 1 # Allow holding key due to set_repeat
+                            latency.changed("bet_adjust")
                     elif event.key == pygame.K_DOWN:
                         if current_bet > 0:
                             current_bet -= 1
+                            latency.changed("bet_adjust")
                     elif event.key == pygame.K_RETURN or event.key == pygame.K_KP_ENTER:
                         if current_bet > 0 and current_bet <= player_coins and not bet_confirmed:
                             player_coins -= current_bet
                             # Animate chip from coin total area to bet area
-                            coin_area_pos = (60, HEIGHT - 20)
-                            bet_area_pos = (WIDTH // 2, HEIGHT // 2 + 80) # Center below bet text
-                            chip_animations.append(ChipAnimation(coin_area_pos, bet_area_pos, ANIMATION_DURATION / 2, current_bet))
+                            chip_animations.append(chip_pool.acquire(layout.coin_area_pos, layout.bet_area_pos, ANIMATION_DURATION / 2, current_bet))
                             bet_confirmed = True
+                            latency.changed("bet_confirm")
                             print(f"Bet confirmed: {current_bet}. Waiting for chip animation.")
 
                 # Player Turn (Idle State) - PI Input
                 elif game_state == "idle" and is_pi_input_required():
                     if event.unicode.isdigit(): # Use unicode for digits 0-9
                         player_pi_input += event.unicode
+                        latency.changed("pi_edit")
                     elif event.key == pygame.K_BACKSPACE:
                         player_pi_input = player_pi_input[:-1]
+                        latency.changed("pi_edit")
                     elif event.key == pygame.K_RETURN or event.key == pygame.K_KP_ENTER:
                         if player_pi_input: # Check if input is not empty
                             try:
@@ -819,12 +917,14 @@ def main():
                                         card = item["card"]
                                         if card.get("joker", False) and card.get("value") is None:
                                             card["value"] = val
+                                            metrics.pi_assignments["player"] += 1
+                                            latency.changed("pi_enter")
                                             print(f"Player assigned PI card value: {val}")
                                             player_pi_input = "" # Clear input field
 
                                             # Check for immediate bust after assignment
                                             player_total = calculate_player_total()
-                                            if player_total > THRESHOLD:
+                                            if player_total > RULES.threshold:
                                                 print("Player busts after assigning PI value.")
                                                 game_state = "round_end"
                                                 determine_winner() # This will set result to bust
@@ -854,23 +954,27 @@ def main():
                         if event.key == pygame.K_r:
                            print("Restarting game after Win.")
                            reset_game()
+                           latency.changed("restart")
                            continue # Skip Space check
                     elif player_coins <= 0:
                         # If game is over (no coins), 'R' should restart
                         if event.key == pygame.K_r:
                             print("Restarting game from Round End (Game Over).")
                             reset_game()
+                            latency.changed("restart")
                             continue # Skip Space check
                     # If not won/lost, Space proceeds
                     elif event.key == pygame.K_SPACE:
                         print("Starting new round.")
                         reset_round()
+                        latency.changed("next_round")
 
         # --- Handle Mouse Clicks Outside Event Loop (for buttons) ---
         # Menu Icon Click
         menu_rect = draw_menu_icon() # Get rect while drawing
         if mouse_click and menu_rect.collidepoint(mouse_pos) and not restart_confirmation:
             menu_overlay_active = not menu_overlay_active
+            latency.changed("menu")
             if menu_overlay_active: # Reset confirmation if opening menu
                 restart_confirmation = False
 
@@ -882,10 +986,9 @@ def main():
                      current_bet = player_coins # Bet all coins
                      player_coins = 0 # Coins are now committed to the bet
                      # Animate chip
-                     coin_area_pos = (60, HEIGHT - 20)
-                     bet_area_pos = (WIDTH // 2, HEIGHT // 2 + 80)
-                     chip_animations.append(ChipAnimation(coin_area_pos, bet_area_pos, ANIMATION_DURATION / 2, current_bet))
+                     chip_animations.append(chip_pool.acquire(layout.coin_area_pos, layout.bet_area_pos, ANIMATION_DURATION / 2, current_bet))
                      bet_confirmed = True
+                     latency.changed("all_in")
                      print(f"Bet confirmed (ALL IN): {current_bet}. Waiting for chip animation.")
 
 
@@ -897,10 +1000,11 @@ def main():
             active_chips = []
             for chip in chip_animations:
                 pos, done = chip.update(dt)
-                draw_chip(pos)
+                draw_chip(chip, pos)
                 if not done:
                     active_chips.append(chip)
-                # else: print("Chip animation finished.") # Debug
+                else:
+                    chip_pool.release(chip)
             chip_animations = active_chips
 
         # --- Game State Specific Drawing & Logic ---
@@ -953,7 +1057,7 @@ def main():
                             print("Dealing sequence finished.")
                             player_total = calculate_player_total()
                             # Check for immediate player bust
-                            if player_total > THRESHOLD:
+                            if player_total > RULES.threshold:
                                 print("Player busts.")
                                 game_state = "round_end"
                                 determine_winner()
@@ -977,6 +1081,10 @@ def main():
                     # If the animation queue is NOT empty, the loop continues processing.
                     # The game state ('dealing' or 'dealer_turn') remains as it was.
 
+            # The search dealer's move, once its worker thread has one (see dealer_turn())
+            if game_state == "dealer_turn" and dealer_ai.thinking and active_animation is None and not animation_queue:
+                apply_dealer_ai_move()
+
             # Draw static cards (dealer first, then player)
             draw_all_cards()
 
@@ -1017,20 +1125,39 @@ def main():
                     print("Home option clicked - Action TBD (e.g., quit)")
                     # running = False # Example action
                     menu_overlay_active = False
+                    latency.changed("menu", next_frame=True)
                 elif option_rects["restart"].collidepoint(mouse_pos):
                     print("Restart option selected")
                     restart_confirmation = True
+                    latency.changed("menu") # Confirmation overlay is drawn below
                     menu_overlay_active = False 
                 elif option_rects["options"].collidepoint(mouse_pos):
                     print("Options option clicked - Action TBD")
                     menu_overlay_active = False
+                    latency.changed("menu", next_frame=True)
 
         if restart_confirmation:
             draw_restart_confirmation_overlay()
 
 
-        pygame.display.flip()
-
+        present_frame()
+        latency.flipped()
+
+        # Hand a snapshot to the writer thread when the state changed (never blocks on disk)
+        key = snapshot_key()
+        if key != last_snapshot_key:
+            last_snapshot_key = key
+            snapshots.submit(encode_session(session_state()))
+        frame_work = time.perf_counter() - frame_start
+        frame_cap.record(frame_work)
+        metrics.coins = player_coins
+        metrics.observe_frame(frame_work, clock.get_fps())
+        memwatch.tick()
+        dealer_ai.frame_finished()
+
+    snapshots.close() # Finish the last write before exiting
+    latency.report()
+    recorder.close()
     pygame.quit()
     sys.exit()
     
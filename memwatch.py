@@ -0,0 +1,174 @@
+import collections
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+import pygame
+
+from options import positive_setting
+
+# Memory diagnostics for soak runs (opt-in: PIBJ_MEMWATCH=<seconds between checks>, or --memwatch).
+# Every interval it takes a tracemalloc snapshot and logs:
+#   - traced memory per subsystem (source file) with its growth since the previous check, and the
+#     allocation sites that grew most since the previous check
+#   - on an alert, the same per-subsystem and per-site growth since the baseline taken after warm-up
+#   - RSS, the number of live pygame Surfaces and the size of the game's surface caches
+# When RSS or traced memory keeps growing - up at every one of the last ALERT_CHECKS checks and
+# more than PIBJ_MEMWATCH_ALERT_MB (default 20) above the baseline - it logs a MEMORY ALERT with
+# the growth rate and the top growing sites. tracemalloc slows the game down noticeably and each
+# check holds up one frame for a few hundred ms, which is why this is a diagnostics mode and not always on.
+
+TOP_SITES = 8       # Allocation sites listed per check
+ALERT_CHECKS = 5    # Consecutive growing checks before alerting
+WARMUP_CHECKS = 2   # Checks before the baseline is taken (caches fill up while the first rounds are played)
+ALERT_MB = 20       # Default growth above the baseline that alerts (PIBJ_MEMWATCH_ALERT_MB)
+TRACE_FRAMES = 1    # Default stack frames kept per allocation (PIBJ_MEMWATCH_FRAMES)
+
+
+def memwatch_interval(argv=None):
+    # Seconds between checks, or None when the mode is off
+    return positive_setting("PIBJ_MEMWATCH", "--memwatch", "60", "seconds between checks", argv)
+
+
+def memwatch_alert_mb(argv=None):
+    # Growth above the baseline that alerts; a bad value falls back to the default
+    value = positive_setting("PIBJ_MEMWATCH_ALERT_MB", "--memwatch-alert-mb", str(ALERT_MB), "megabytes", argv)
+    return ALERT_MB if value is None else value
+
+
+def memwatch_frames(argv=None):
+    # Stack frames tracemalloc keeps per allocation; a bad value falls back to the default
+    value = positive_setting("PIBJ_MEMWATCH_FRAMES", "--memwatch-frames", str(TRACE_FRAMES), "a number of stack frames", argv)
+    return TRACE_FRAMES if value is None else max(1, int(value))
+
+
+def rss_bytes():
+    # Resident set size from /proc (Linux); peak RSS elsewhere
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def count_surfaces():
+    # Surfaces are not tracked by the garbage collector, so look for them in the containers that are
+    seen = set()
+    for obj in gc.get_objects():
+        for ref in gc.get_referents(obj):
+            if type(ref) is pygame.Surface:
+                seen.add(id(ref))
+    return len(seen)
+
+
+def _subsystem(filename):
+    name = os.path.basename(filename)
+    if "pygame" in filename:
+        return "pygame"
+    return name[:-3] if name.endswith(".py") else name
+
+
+def _mb(n):
+    return n / (1024 * 1024)
+
+
+class MemoryWatch:
+    def __init__(self, interval=None, alert_mb=None, gauges=None):
+        self.interval = memwatch_interval() if interval is None else interval
+        self.enabled = self.interval is not None
+        # The alert/frames settings are only read when the watch is on, so a stray bad value does
+        # not warn on every launch
+        self.alert_bytes = (alert_mb or (memwatch_alert_mb() if self.enabled else ALERT_MB)) * 1024 * 1024
+        self.gauges = gauges or {}  # name -> callable returning a number (e.g. cache sizes)
+        self.history = collections.deque(maxlen=ALERT_CHECKS + 1)  # (time, rss, traced)
+        self.checks = 0
+        self.baseline = None
+        self.previous = None
+        self.next_check = 0.0
+        self.filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")]
+        if self.enabled:
+            tracemalloc.start(memwatch_frames())
+            self.next_check = time.monotonic() + self.interval
+            print(f"Memory watch on: checking every {self.interval:g}s, alert above {_mb(self.alert_bytes):g} MB growth")
+
+    def add_gauge(self, name, read):
+        self.gauges[name] = read
+
+    def tick(self):
+        # Call once per frame; only does work every interval
+        if not self.enabled or time.monotonic() < self.next_check:
+            return
+        self.next_check = time.monotonic() + self.interval
+        self.check()
+
+    def check(self):
+        start = time.perf_counter()
+        snapshot = tracemalloc.take_snapshot().filter_traces(self.filters)
+        traced, peak = tracemalloc.get_traced_memory()
+        rss = rss_bytes()
+        surfaces = count_surfaces()
+        self.checks += 1
+        self.history.append((time.monotonic(), rss, traced))
+
+        gauges = ", ".join(f"{name} {read()}" for name, read in self.gauges.items())
+        print(f"[memwatch] check {self.checks}: RSS {_mb(rss):.1f} MB, traced {_mb(traced):.1f} MB (peak {_mb(peak):.1f}), "
+              f"{surfaces} surfaces{', ' + gauges if gauges else ''}")
+
+        if self.previous is None:
+            per_subsystem = collections.Counter()
+            for stat in snapshot.statistics("filename"):
+                per_subsystem[_subsystem(stat.traceback[0].filename)] += stat.size
+            print("[memwatch]   by subsystem: " + ", ".join(f"{name} {_mb(size):.2f} MB" for name, size in per_subsystem.most_common(6)))
+        else:
+            self.log_subsystems("since last check", snapshot.compare_to(self.previous, "filename"))
+            self.log_growth("since last check", snapshot.compare_to(self.previous, "lineno"))
+        if self.baseline is None and self.checks > WARMUP_CHECKS:
+            self.baseline = (snapshot, rss, traced)
+            print("[memwatch]   baseline taken")
+        elif self.baseline is not None:
+            self.check_alert(snapshot, rss, traced)
+        self.previous = snapshot
+        print(f"[memwatch]   check took {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def log_subsystems(self, label, differences):
+        # Stat diffs grouped by file are summed per subsystem (all of pygame counts as one)
+        growth = collections.Counter()
+        size = collections.Counter()
+        for diff in differences:
+            name = _subsystem(diff.traceback[0].filename)
+            growth[name] += diff.size_diff
+            size[name] += diff.size
+        ranked = sorted((name for name in growth if growth[name]), key=lambda name: growth[name], reverse=True)[:6]
+        if not ranked:
+            return
+        print(f"[memwatch]   by subsystem, growth {label}: " +
+              ", ".join(f"{name} {growth[name] / 1024:+.1f} KiB ({_mb(size[name]):.2f} MB)" for name in ranked))
+
+    def log_growth(self, label, differences):
+        growing = [diff for diff in differences if diff.size_diff > 0][:TOP_SITES]
+        if not growing:
+            return
+        print(f"[memwatch]   top growth {label}:")
+        for diff in growing:
+            frame = diff.traceback[0]
+            print(f"[memwatch]     {_subsystem(frame.filename)}:{frame.lineno} +{diff.size_diff / 1024:.1f} KiB "
+                  f"(+{diff.count_diff} blocks, {diff.size / 1024:.1f} KiB total)")
+
+    def check_alert(self, snapshot, rss, traced):
+        baseline_snapshot, baseline_rss, baseline_traced = self.baseline
+        if len(self.history) <= ALERT_CHECKS:
+            return
+        samples = list(self.history)
+        for index, name, grown in ((1, "RSS", rss - baseline_rss), (2, "traced memory", traced - baseline_traced)):
+            steady = all(later[index] > earlier[index] for earlier, later in zip(samples, samples[1:]))
+            if steady and grown > self.alert_bytes:
+                hours = (samples[-1][0] - samples[0][0]) / 3600
+                rate = _mb(samples[-1][index] - samples[0][index]) / hours if hours else 0.0
+                print(f"[memwatch] MEMORY ALERT: {name} grew {_mb(grown):.1f} MB since the baseline and at each of "
+                      f"the last {ALERT_CHECKS} checks ({rate:.1f} MB/hour)")
+                self.log_subsystems("since the baseline", snapshot.compare_to(baseline_snapshot, "filename"))
+                self.log_growth("since the baseline", snapshot.compare_to(baseline_snapshot, "lineno"))
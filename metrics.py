@@ -0,0 +1,147 @@
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from options import env_or_flag
+
+# Cabinet metrics in the Prometheus text format.
+# The game updates plain attributes of a Metrics object from its main loop: single-writer int/float
+# writes under the GIL with no locks, so a frame only pays for a few attribute writes. The HTTP server (opt-in:
+# PIBJ_METRICS_PORT or --metrics-port, optionally PIBJ_METRICS_HOST / --metrics-host, default 127.0.0.1) runs in a daemon thread and
+# only reads them, so a scrape never stalls a frame; a scrape may see one frame's update half done.
+
+# Frame work time histogram bucket upper bounds in seconds (16.7 ms / 33.3 ms: one 60 / 30 FPS frame)
+FRAME_BUCKETS = [0.002, 0.004, 0.008, 0.0167, 0.0333, 0.05, 0.1, 0.25, float("inf")]
+DEFAULT_PORT = 9314 # Port for a bare --metrics-port
+
+
+def metrics_port(argv=None):
+    # TCP port to serve metrics on, or None when the server is off ("" or "0") or the port is invalid
+    value = env_or_flag("PIBJ_METRICS_PORT", "--metrics-port", argv=argv, flag_value=str(DEFAULT_PORT))
+    if value in ("", "0"):
+        return None
+    try:
+        port = int(value)
+    except ValueError:
+        port = 0
+    if not 1 <= port <= 65535:
+        print(f"Ignoring PIBJ_METRICS_PORT={value!r}: expected a port number from 1 to 65535; metrics server not started")
+        return None
+    return port
+
+
+class Metrics:
+    def __init__(self):
+        self.started = time.time()
+        self.frame_counts = [0] * len(FRAME_BUCKETS)
+        self.frame_seconds_sum = 0.0
+        self.frames = 0
+        self.fps = 0.0
+        self.rounds = 0
+        self.results = {"win": 0, "push": 0, "loss": 0}
+        self.coins = 0
+        self.coins_bet = 0
+        self.coins_paid = 0
+        self.reshuffles = {"round": 0, "empty_deck": 0}
+        self.pi_assignments = {"player": 0, "dealer": 0}
+
+    def observe_frame(self, work_seconds, fps):
+        self.frame_counts[bisect.bisect_left(FRAME_BUCKETS, work_seconds)] += 1
+        self.frame_seconds_sum += work_seconds
+        self.frames += 1
+        self.fps = fps
+
+    def round_settled(self, bet, multiplier, rules):
+        # Called from determine_winner() with the bet and the payout multiplier it applied
+        self.rounds += 1
+        if multiplier == rules.payout_push:
+            self.results["push"] += 1
+        elif multiplier > rules.payout_push:
+            self.results["win"] += 1
+        else:
+            self.results["loss"] += 1
+        self.coins_bet += bet
+        self.coins_paid += bet * multiplier
+
+    def render(self):
+        lines = [
+            "# HELP pibj_frame_work_seconds Time spent updating and drawing a frame (excluding the FPS wait).",
+            "# TYPE pibj_frame_work_seconds histogram",
+        ]
+        cumulative = 0
+        for bound, count in zip(FRAME_BUCKETS, self.frame_counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'pibj_frame_work_seconds_bucket{{le="{le}"}} {cumulative}')
+        lines.append(f"pibj_frame_work_seconds_sum {self.frame_seconds_sum}")
+        lines.append(f"pibj_frame_work_seconds_count {cumulative}")
+        lines += [
+            "# HELP pibj_fps Frames per second (pygame clock average).",
+            "# TYPE pibj_fps gauge",
+            f"pibj_fps {self.fps}",
+            "# HELP pibj_rounds_total Rounds settled.",
+            "# TYPE pibj_rounds_total counter",
+            f"pibj_rounds_total {self.rounds}",
+            "# HELP pibj_round_results_total Rounds settled by result for the player.",
+            "# TYPE pibj_round_results_total counter",
+        ]
+        lines += [f'pibj_round_results_total{{result="{result}"}} {count}' for result, count in self.results.items()]
+        lines += [
+            "# HELP pibj_coins Player coins.",
+            "# TYPE pibj_coins gauge",
+            f"pibj_coins {self.coins}",
+            "# HELP pibj_coins_bet_total Coins bet on settled rounds.",
+            "# TYPE pibj_coins_bet_total counter",
+            f"pibj_coins_bet_total {self.coins_bet}",
+            "# HELP pibj_coins_paid_total Coins paid back to the player (stake included).",
+            "# TYPE pibj_coins_paid_total counter",
+            f"pibj_coins_paid_total {self.coins_paid}",
+            "# HELP pibj_deck_reshuffles_total New decks, per round or because the deck ran out mid-round.",
+            "# TYPE pibj_deck_reshuffles_total counter",
+        ]
+        lines += [f'pibj_deck_reshuffles_total{{reason="{reason}"}} {count}' for reason, count in self.reshuffles.items()]
+        lines += [
+            "# HELP pibj_pi_assignments_total PI card values assigned.",
+            "# TYPE pibj_pi_assignments_total counter",
+        ]
+        lines += [f'pibj_pi_assignments_total{{by="{by}"}} {count}' for by, count in self.pi_assignments.items()]
+        lines += [
+            "# HELP pibj_start_time_seconds Unix time the game started.",
+            "# TYPE pibj_start_time_seconds gauge",
+            f"pibj_start_time_seconds {self.started}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(metrics, port=None, host=None):
+    # Serves /metrics in a daemon thread when a port is given (or PIBJ_METRICS_PORT / --metrics-port is set)
+    port = port or metrics_port()
+    if not port:
+        return None
+    host = host or env_or_flag("PIBJ_METRICS_HOST", "--metrics-host", "127.0.0.1")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass # Scrapes would flood the game's console
+
+    try:
+        server = ThreadingHTTPServer((host, int(port)), Handler)
+    except OSError as e:
+        print(f"Metrics server not started on {host}:{port}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"Serving metrics on http://{host}:{server.server_port}/metrics")
+    return server
@@ -0,0 +1,32 @@
+import os
+import sys
+
+# Opt-in settings shared by the game's modules: every PIBJ_* environment variable that turns on a
+# mode can also be given on the command line. "--flag=value" sets the value, a bare "--flag" uses
+# flag_value, and the command line wins over the environment.
+
+
+def env_or_flag(name, flag, default="", argv=None, flag_value="1"):
+    # Value of --flag from the command line, else of the environment variable name, else default
+    for arg in (sys.argv[1:] if argv is None else argv):
+        if arg == flag:
+            return flag_value
+        if arg.startswith(flag + "="):
+            return arg.split("=", 1)[1]
+    return os.environ.get(name, default)
+
+
+def switch_enabled(name, flag, argv=None):
+    # On/off setting: on unless unset, empty or "0"
+    return env_or_flag(name, flag, argv=argv) not in ("", "0")
+
+
+def positive_setting(name, flag, flag_value, expected, argv=None):
+    # Number setting where the mode is off unless it is positive; returns the number or None
+    value = env_or_flag(name, flag, argv=argv, flag_value=flag_value)
+    try:
+        number = float(value) if value else 0
+    except ValueError:
+        print(f"Ignoring {name}={value!r}: expected {expected}")
+        return None
+    return number if number > 0 else None
@@ -0,0 +1,207 @@
+import dataclasses
+import hashlib
+import json
+import math
+import random
+
+# Headless Pi Blackjack rules shared by the game (main_new.py) and the analysis tools.
+# Nothing in here touches pygame, so it can be imported without opening a window.
+
+STARTING_COINS = 100       # Coins at the start of a game
+WINNING_COIN_TARGET = 314  # Reaching this many coins wins the game
+
+# Values of the game's game_state variable
+GAME_STATES = ["betting", "dealing", "idle", "dealer_turn", "round_end", "game_over", "game_won"]
+
+SUITS = ["♠", "♥", "♦", "♣"]
+RANKS = list(map(str, range(2, 11))) + ["J", "Q", "K", "A"]
+
+# Card classes used for shoe compositions: every card with the same value behaves the same
+# way for the rules, so a shoe can be summarised as a tuple of counts in this order.
+# The PI card (joker) has no value until it is assigned.
+CARD_CLASSES = list(map(str, range(2, 11))) + ["F", "A", "PI"]
+_RANK_CLASS = {rank: CARD_CLASSES.index("F" if rank in ["J", "Q", "K"] else rank) for rank in RANKS + ["PI"]}
+
+
+@dataclasses.dataclass(frozen=True)
+class Rules:
+    threshold: float = math.pi * 7  # Bust threshold is now π*7
+    face_value: float = math.pi     # Pi value for face cards
+    ace_value: float = 11           # Ace is a fixed 11 (no 1/11 rule in Pi Blackjack)
+    num_jokers: int = 2             # PI cards added to each deck
+    dealer_stand: float = 17        # Dealer hits below this total
+    # Multipliers applied to the bet when a round is settled (the bet is taken off the coins first)
+    payout_win: float = 2
+    payout_push: float = 1
+    payout_loss: float = 0
+
+    def class_values(self):
+        # Value of each CARD_CLASSES entry (None for the PI card)
+        return list(range(2, 11)) + [self.face_value, self.ace_value, None]
+
+    def fresh_shoe(self):
+        # Composition of a brand new deck
+        return (4,) * 9 + (12, 4, self.num_jokers)
+
+
+DEFAULT_RULES = Rules()
+
+
+def rules_hash(rules):
+    # Content hash of a rules variant: equal settings always give the same hash (11 and 11.0 included)
+    values = {field.name: float(getattr(rules, field.name)) if field.type is float else getattr(rules, field.name)
+              for field in dataclasses.fields(rules)}
+    data = json.dumps(values, sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def card_value(rank, rules=DEFAULT_RULES):
+    if rank in ["J", "Q", "K"]:
+        return rules.face_value
+    elif rank == "A":
+        return rules.ace_value
+    return int(rank)
+
+
+def build_deck(rules=DEFAULT_RULES):
+    # Unshuffled deck: one of every rank per suit plus the PI cards
+    deck = []
+    for suit in SUITS:
+        for rank in RANKS:
+            deck.append({"rank": rank, "suit": suit, "value": card_value(rank, rules), "face_down": False})
+
+    # Add the special PI cards (jokers). Value is None until assigned.
+    for _ in range(rules.num_jokers):
+        deck.append({"rank": "PI", "suit": "", "value": None, "face_down": False, "joker": True})
+    return deck
+
+
+def create_deck(rules=DEFAULT_RULES, rng=random):
+    deck = build_deck(rules)
+    rng.shuffle(deck)
+    return deck
+
+
+def card_class(card):
+    # Index into CARD_CLASSES for a card dict
+    return _RANK_CLASS[card["rank"]]
+
+
+def shoe_composition(cards):
+    counts = [0] * len(CARD_CLASSES)
+    for card in cards:
+        counts[card_class(card)] += 1
+    return tuple(counts)
+
+
+def dealer_pi_value(current_total, rules=DEFAULT_RULES):
+    # Try to get as close to the threshold as possible without busting.
+    # Assign a minimal value of 1 if aiming for threshold busts or is non-positive.
+    assign_val = rules.threshold - current_total
+    if assign_val <= 0 or current_total + assign_val > rules.threshold:
+        assign_val = 1
+    if current_total + 1 > rules.threshold:
+        assign_val = 1
+    return assign_val
+
+
+def assign_dealer_pi(values, rules=DEFAULT_RULES):
+    # values: visible dealer card values in hand order, None for an unassigned PI card.
+    # Returns the values with every PI card assigned, exactly as the dealer does it in game:
+    # first total everything that already has a value, then fill the PI cards left to right.
+    current_total = 0
+    for value in values:
+        if value is not None:
+            current_total += value
+    assigned = []
+    for value in values:
+        if value is None:
+            value = dealer_pi_value(current_total, rules)
+            current_total += value
+        assigned.append(value)
+    return assigned
+
+
+def settle(player_total, dealer_total, rules=DEFAULT_RULES):
+    # Returns (round result text, payout multiplier)
+    if player_total > rules.threshold:
+        return "Player Busts! Dealer Wins!", rules.payout_loss
+    elif dealer_total > rules.threshold:
+        return "Dealer Busts! Player Wins!", rules.payout_win
+    elif player_total > dealer_total:
+        return "Player Wins!", rules.payout_win
+    elif dealer_total > player_total:
+        return "Dealer Wins!", rules.payout_loss
+    else:  # Tie (Push)
+        return "Push! It's a Tie!", rules.payout_push
+
+
+# --- Headless round ---
+# Player strategies are plain module-level functions so they can be sent to worker processes:
+#   hit_policy(player_total, upcard, rules) -> True to hit, False to stand
+#   pi_policy(player_total, upcard, rules)  -> positive int for the next unassigned PI card
+# player_total counts unassigned PI cards as 0, like the in-game total.
+
+def stand_on_dealer_value(player_total, upcard, rules=DEFAULT_RULES):
+    # Mirror the dealer: hit below the dealer's stand value
+    return player_total < rules.dealer_stand
+
+
+def largest_safe_pi(player_total, upcard, rules=DEFAULT_RULES):
+    # Largest whole number that does not bust (at least 1)
+    return max(1, math.floor(rules.threshold - player_total))
+
+
+def _draw(deck, rules, rng):
+    # Reshuffle when the deck runs out, like the game does
+    if not deck:
+        deck.extend(create_deck(rules, rng))
+    return deck.pop()
+
+
+def _total(values):
+    total = 0
+    for value in values:
+        if value is not None:
+            total += value
+    return total
+
+
+def play_round(deck, hit_policy=stand_on_dealer_value, pi_policy=largest_safe_pi, rules=DEFAULT_RULES, rng=random):
+    # Plays one round from deck (cards are popped from the end, as in the game) and
+    # returns (round result text, payout multiplier). rng shuffles the new deck when it runs out;
+    # pass a seeded random.Random for reproducible runs.
+    if len(deck) < 4:
+        deck[:] = create_deck(rules, rng)
+    player = [_draw(deck, rules, rng)["value"]]
+    upcard = _draw(deck, rules, rng)
+    player.append(_draw(deck, rules, rng)["value"])
+    hole = _draw(deck, rules, rng)
+    dealer = [upcard["value"], hole["value"]]
+
+    def player_busts():
+        # PI input is asked for after the bust check, and again after every assignment
+        if _total(player) > rules.threshold:
+            return True
+        for i, value in enumerate(player):
+            if value is None:
+                pi_value = int(pi_policy(_total(player), upcard, rules))
+                if pi_value <= 0:
+                    raise ValueError("PI value must be positive")
+                player[i] = pi_value
+                if _total(player) > rules.threshold:
+                    return True
+        return False
+
+    busted = player_busts()
+    while not busted and hit_policy(_total(player), upcard, rules):
+        player.append(_draw(deck, rules, rng)["value"])
+        busted = player_busts()
+
+    if not busted:
+        # Dealer turn: reveal, assign PI cards, hit below the stand value
+        dealer = assign_dealer_pi(dealer, rules)
+        while _total(dealer) < rules.dealer_stand:
+            dealer = assign_dealer_pi(dealer + [_draw(deck, rules, rng)["value"]], rules)
+
+    return settle(_total(player), _total(dealer), rules)
@@ -0,0 +1,153 @@
+import copy
+
+import pygame
+
+from options import env_or_flag, switch_enabled
+
+# Rendering profiles.
+# "default" renders straight to a resizable window; the layout (layout.py) follows its size.
+# "lowpower" is meant for Raspberry-Pi-class cabinets: every cached surface is converted to the
+# display pixel format (so blits are plain copies instead of per-pixel format conversions), the
+# table is drawn into an 800x400 canvas (fewer pixels to fill than the default 1200x600) that is
+# scaled once per frame to the usual 1200x600 window, and the FPS cap drops from 60 to 30 when
+# frames keep missing their budget, so the frame rate is a steady 30 rather than a stuttering 40-60.
+#
+# Select with the PIBJ_RENDER_PROFILE environment variable or --profile=<name> on the command line.
+# The canvas size can be changed with PIBJ_INTERNAL_SIZE=<width>x<height> (or --internal-size=).
+# PIBJ_FULLSCREEN=1 (or --fullscreen) opens a fullscreen window at the desktop size instead; the
+# canvas is then scaled up to the whole screen, which costs more per frame than the 1200x600 window.
+
+
+class RenderProfile:
+    def __init__(self, name, convert_surfaces=False, native_window=False, adaptive_fps=False, fps_steps=None,
+                 max_internal_size=None):
+        self.name = name
+        self.convert_surfaces = convert_surfaces # convert()/convert_alpha() cached surfaces
+        self.native_window = native_window       # Fullscreen at the desktop size, canvas scaled once per frame
+        self.adaptive_fps = adaptive_fps         # Step the FPS cap down/up based on measured frame time
+        self.fps_steps = fps_steps               # Allowed FPS caps, highest first (None: the game's FPS)
+        self.max_internal_size = max_internal_size # Largest size to render at before scaling (None: window size)
+
+
+PROFILES = {
+    "default": RenderProfile("default"),
+    "lowpower": RenderProfile("lowpower", convert_surfaces=True, adaptive_fps=True, fps_steps=(60, 30),
+                              max_internal_size=(800, 400)),
+}
+
+
+def select_profile(argv=None):
+    name = env_or_flag("PIBJ_RENDER_PROFILE", "--profile", "default", argv)
+    size = env_or_flag("PIBJ_INTERNAL_SIZE", "--internal-size", argv=argv)
+    fullscreen = switch_enabled("PIBJ_FULLSCREEN", "--fullscreen", argv)
+    if name not in PROFILES:
+        print(f"Unknown render profile '{name}', using default. Choices: {', '.join(PROFILES)}")
+        name = "default"
+    profile = PROFILES[name]
+    if size or fullscreen:
+        profile = copy.copy(profile)
+        profile.native_window = profile.native_window or fullscreen
+        if size:
+            try:
+                width, height = (int(n) for n in size.lower().split("x"))
+                if width <= 0 or height <= 0:
+                    raise ValueError
+                profile.max_internal_size = (width, height)
+            except ValueError:
+                print(f"Ignoring internal size {size!r}: expected <width>x<height>, e.g. 800x400")
+    return profile
+
+
+def window_size(profile, canvas_size):
+    # Size (and flags) to open the display with: the game's usual window unless fullscreen was
+    # asked for. A profile with a smaller max_internal_size renders below this and scales up to it.
+    if profile.native_window:
+        desktop_sizes = pygame.display.get_desktop_sizes()
+        if desktop_sizes:
+            return desktop_sizes[0], pygame.FULLSCREEN
+    return canvas_size, pygame.RESIZABLE
+
+
+def internal_size(profile, window_size):
+    # Size to render the game at for a window: the window itself, or shrunk to fit
+    # max_internal_size while keeping the window's aspect ratio
+    width, height = window_size
+    if profile.max_internal_size is None:
+        return (width, height)
+    max_width, max_height = profile.max_internal_size
+    scale = min(1, max_width / width, max_height / height)
+    return (max(1, round(width * scale)), max(1, round(height * scale)))
+
+
+class SurfaceCache:
+    # Rendered text and filled overlay surfaces, created once and reused every frame
+    MAX_TEXT_ENTRIES = 512 # Dynamic text (totals, coins) keeps adding entries; start over past this
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.texts = {}
+        self.overlays = {}
+
+    def text(self, font, text, color):
+        key = (id(font), text, color)
+        surface = self.texts.get(key)
+        if surface is None:
+            if len(self.texts) >= self.MAX_TEXT_ENTRIES:
+                self.texts.clear()
+            surface = font.render(text, True, color)
+            if self.profile.convert_surfaces:
+                surface = surface.convert_alpha()
+            self.texts[key] = surface
+        return surface
+
+    def overlay(self, size, color):
+        # Surface of the given size filled with an RGBA color
+        key = (size, color)
+        surface = self.overlays.get(key)
+        if surface is None:
+            surface = pygame.Surface(size, pygame.SRCALPHA)
+            surface.fill(color)
+            if self.profile.convert_surfaces:
+                surface = surface.convert_alpha()
+            self.overlays[key] = surface
+        return surface
+
+    def clear(self):
+        self.texts.clear()
+        self.overlays.clear()
+
+
+class AdaptiveFrameCap:
+    # Picks the FPS cap from profile.fps_steps using an average of the measured work per frame
+    # (time spent updating and drawing, not waiting in clock.tick)
+    SMOOTHING = 0.05      # Weight of the newest frame in the moving average
+    DOWN_LOAD = 0.85      # Step down when work takes more than this share of the frame budget
+    UP_LOAD = 0.45        # Step back up when work would take less than this share at the higher cap
+    HOLD_FRAMES = 120     # Frames to wait after a change before changing again
+
+    def __init__(self, profile, default_fps):
+        self.steps = profile.fps_steps or (default_fps,)
+        self.enabled = profile.adaptive_fps and len(self.steps) > 1
+        self.index = 0
+        self.average_work = 0.0
+        self.frames_since_change = 0
+
+    @property
+    def fps(self):
+        return self.steps[self.index]
+
+    def record(self, work_seconds):
+        if not self.enabled:
+            return
+        self.average_work += (work_seconds - self.average_work) * self.SMOOTHING
+        self.frames_since_change += 1
+        if self.frames_since_change < self.HOLD_FRAMES:
+            return
+        if self.index + 1 < len(self.steps) and self.average_work > self.DOWN_LOAD / self.fps:
+            self.index += 1
+        elif self.index > 0 and self.average_work < self.UP_LOAD / self.steps[self.index - 1]:
+            self.index -= 1
+        else:
+            return
+        self.frames_since_change = 0
+        print(f"Frame cap now {self.fps} FPS (average frame work {self.average_work * 1000:.1f} ms)")
@@ -0,0 +1,86 @@
+import base64
+import json
+import random
+
+import pygame
+
+from dealer_ai import dealer_ai_budget
+from options import env_or_flag
+
+# Session recordings for replays (export_replay.py renders them to image sequences).
+# Opt-in with PIBJ_RECORD=<file> or --record[=<file>] (default session.rec). A recording is JSON lines:
+#   header: {"version", "seed", "snapshot"} - the session at the start (snapshot.py format,
+#           base64) and the seed the game's shuffle generator is reset to, so reshuffles repeat,
+#           plus "dealer_ai", the search dealer's budget in ms (null for the rule-book dealer)
+#   then one line per frame that had input: [game time ms, game_state, mouse x, mouse y, events]
+#   with the mouse in 1200x600 board coordinates (layout.to_base) and events as
+#   [type, key, unicode, button]. Frames without input are not stored.
+
+RECORD_VERSION = 1
+RECORDED_EVENTS = (pygame.QUIT, pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN)
+
+
+class SessionRecorder:
+    def __init__(self, path=None):
+        self.path = env_or_flag("PIBJ_RECORD", "--record", flag_value="session.rec") if path is None else path
+        self.file = None
+        self.time_ms = 0
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def start(self, snapshot_data, shuffle_rng):
+        # Call once the session is ready (after a snapshot restore), before the first frame.
+        # shuffle_rng is the game's own random.Random for deck shuffles; only it is reseeded, so
+        # other users of the random module are not affected by recording.
+        if not self.enabled:
+            return
+        seed = random.randrange(2 ** 32)
+        shuffle_rng.seed(seed)
+        self.file = open(self.path, "w", encoding="utf-8")
+        header = {"version": RECORD_VERSION, "seed": seed, "snapshot": base64.b64encode(snapshot_data).decode("ascii"),
+                  "dealer_ai": dealer_ai_budget()}
+        self.file.write(json.dumps(header) + "\n")
+        print(f"Recording session to {self.path}")
+
+    def record(self, dt_ms, events, mouse_base_pos, game_state):
+        # Call every frame right after polling; dt_ms is what clock.tick returned
+        if self.file is None:
+            return
+        self.time_ms += dt_ms
+        inputs = [[event.type, getattr(event, "key", 0), getattr(event, "unicode", ""), getattr(event, "button", 0)]
+                  for event in events if event.type in RECORDED_EVENTS]
+        if inputs:
+            x, y = mouse_base_pos
+            self.file.write(json.dumps([self.time_ms, game_state, round(x, 1), round(y, 1), inputs]) + "\n")
+            self.file.flush() # A crash keeps everything up to the last input
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def load_recording(path):
+    # Returns (header, frames) with frames as (time ms, game_state, (x, y), [pygame events])
+    with open(path, encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("version") != RECORD_VERSION:
+            raise ValueError(f"{path}: unsupported recording version {header.get('version')}")
+        header["snapshot"] = base64.b64decode(header["snapshot"])
+        frames = []
+        for line in f:
+            if not line.strip():
+                continue
+            time_ms, game_state, x, y, inputs = json.loads(line)
+            events = []
+            for event_type, key, unicode, button in inputs:
+                if event_type == pygame.KEYDOWN:
+                    events.append(pygame.event.Event(event_type, key=key, unicode=unicode))
+                elif event_type == pygame.MOUSEBUTTONDOWN:
+                    events.append(pygame.event.Event(event_type, button=button))
+                else:
+                    events.append(pygame.event.Event(event_type))
+            frames.append((time_ms, game_state, (x, y), events))
+    return header, frames
@@ -0,0 +1,147 @@
+import argparse
+import dataclasses
+import hashlib
+import inspect
+import itertools
+import json
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import dealer_odds
+import pi_rules
+from pi_rules import DEFAULT_RULES, rules_hash, create_deck, play_round
+from dealer_odds import build_fresh_shoe_table, bust_probability
+
+# Rule-variant sweeps: evaluate a grid of Rules variants in worker processes and keep every
+# result on disk, named after a content hash of the rules (and the evaluation settings), so
+# re-running an overnight sweep only computes the variants that are new.
+
+SWEEP_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sweep_cache")
+
+
+def rule_grid(**axes):
+    # rule_grid(num_jokers=[0, 2, 4], dealer_stand=[16, 17]) -> every combination as Rules
+    names = list(axes)
+    return [dataclasses.replace(DEFAULT_RULES, **dict(zip(names, combo)))
+            for combo in itertools.product(*(axes[name] for name in names))]
+
+
+def evaluate_rules(rules, rounds=20000, seed=314):
+    # Exact dealer bust chance per fresh-shoe upcard, plus simulated round outcomes for the
+    # default player strategy (mirror the dealer, largest safe PI value) on seeded shoes
+    table = build_fresh_shoe_table(rules)
+    rng = random.Random(seed)
+    wins = pushes = losses = 0
+    total_return = 0.0
+    for _ in range(rounds):
+        result, multiplier = play_round(create_deck(rules, rng), rules=rules, rng=rng)
+        total_return += multiplier - 1
+        if multiplier == rules.payout_push:
+            pushes += 1
+        elif multiplier > rules.payout_push:
+            wins += 1
+        else:
+            losses += 1
+    return {"dealer_bust": {label: bust_probability(dist) for label, dist in table.items()},
+            "win": wins / rounds,
+            "push": pushes / rounds,
+            "loss": losses / rounds,
+            "player_edge": total_return / rounds}
+
+
+# Modules whose code decides evaluate_rules' results; editing them invalidates cached results too
+EVALUATION_MODULES = (pi_rules, dealer_odds)
+
+
+def _evaluator_key(evaluate):
+    # Name plus a hash of the evaluator's source and of EVALUATION_MODULES: the same under
+    # "python rule_sweep.py" and on import (where __module__ differs), and different as soon as
+    # the evaluator or the game rules it plays by are edited
+    digest = hashlib.sha256()
+    for code in (evaluate,) + EVALUATION_MODULES:
+        try:
+            digest.update(inspect.getsource(code).encode("utf-8"))
+        except (OSError, TypeError):
+            pass
+    return f"{evaluate.__qualname__}-{digest.hexdigest()[:12]}"
+
+
+def _cache_path(rules, settings, cache_dir):
+    # Settings (e.g. round count, seed) change the result too, so they are part of the name
+    settings_hash = hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"{rules_hash(rules)}-{settings_hash[:12]}.json")
+
+
+def _load(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["result"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _store(path, rules, settings, result):
+    # Write to a temp file and rename, so an interrupted sweep never leaves a half-written result
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"rules": dataclasses.asdict(rules), "settings": settings, "result": result}, f)
+    os.replace(tmp_path, path)
+
+
+def sweep(variants, evaluate=evaluate_rules, cache_dir=SWEEP_CACHE_DIR, workers=None, **settings):
+    # Returns [(rules, result)] in the order of variants. evaluate(rules, **settings) must be a
+    # module-level function so it can run in a worker process.
+    os.makedirs(cache_dir, exist_ok=True)
+    settings_key = dict(settings, evaluate=_evaluator_key(evaluate))
+    results = {}
+    pending = {}
+    for rules in dict.fromkeys(variants):  # Skip duplicates, keep order
+        path = _cache_path(rules, settings_key, cache_dir)
+        cached = _load(path)
+        if cached is not None:
+            results[rules] = cached
+        else:
+            pending[rules] = path
+
+    print(f"Sweep: {len(results)} cached, {len(pending)} to evaluate")
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(evaluate, rules, **settings): rules for rules in pending}
+            for done, future in enumerate(as_completed(futures), 1):
+                rules = futures[future]
+                results[rules] = future.result()
+                _store(pending[rules], rules, settings_key, results[rules])
+                print(f"Evaluated {done}/{len(pending)}: {rules}")
+
+    return [(rules, results[rules]) for rules in variants]
+
+
+def _number(text):
+    # Command line values: plain numbers or multiples of pi, e.g. "7*pi"
+    if "pi" in text:
+        factor = text.replace("pi", "").strip("* ")
+        return (float(factor) if factor else 1.0) * math.pi
+    return float(text)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate a grid of rule variants")
+    for field in dataclasses.fields(DEFAULT_RULES):
+        parser.add_argument("--" + field.name.replace("_", "-"), nargs="+", type=_number,
+                            default=[getattr(DEFAULT_RULES, field.name)])
+    parser.add_argument("--rounds", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=314)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache-dir", default=SWEEP_CACHE_DIR)
+    args = parser.parse_args()
+
+    axes = {field.name: getattr(args, field.name) for field in dataclasses.fields(DEFAULT_RULES)}
+    axes["num_jokers"] = [int(n) for n in axes["num_jokers"]]
+    variants = rule_grid(**axes)
+    results = sweep(variants, cache_dir=args.cache_dir, workers=args.workers, rounds=args.rounds, seed=args.seed)
+    for rules, result in sorted(results, key=lambda item: item[1]["player_edge"], reverse=True):
+        changed = {name: value for name, value in dataclasses.asdict(rules).items()
+                   if value != getattr(DEFAULT_RULES, name)}
+        print(f"edge {result['player_edge']:+.4f}  win {result['win']:.3f}  push {result['push']:.3f}  {changed or 'default'}")
@@ -0,0 +1,72 @@
+from pi_rules import DEFAULT_RULES, CARD_CLASSES, card_class, shoe_composition
+
+# Incremental record of which cards have left the deck.
+# The game draws every card through ShoeTracker.draw(), which pops the deck and updates a
+# per-class count vector in O(1), so solvers, advisors and analytics can read the remaining
+# composition (e.g. dealer_odds.dealer_distribution(upcard, shoe.unseen_composition())),
+# penetration and the running count without rescanning the deck or the hands.
+
+# Default count tags per CARD_CLASSES entry, Hi-Lo style: low cards leaving the shoe help the
+# player (+1), high cards and the player-friendly PI card hurt (-1)
+HI_LO_TAGS = {"2": 1, "3": 1, "4": 1, "5": 1, "6": 1, "7": 0, "8": 0, "9": 0,
+              "10": -1, "F": -1, "A": -1, "PI": -1}
+
+
+class ShoeTracker:
+    def __init__(self, rules=DEFAULT_RULES, count_tags=HI_LO_TAGS):
+        self.rules = rules
+        self.tags = [count_tags.get(label, 0) for label in CARD_CLASSES]
+        self.deck_size = sum(rules.fresh_shoe()) # Cards per deck, for the true count
+        self.reset([])
+
+    def reset(self, deck):
+        # Start tracking a new (reshuffled) deck
+        self.remaining = list(shoe_composition(deck))
+        self.hidden = [0] * len(CARD_CLASSES) # Dealt face down, not seen yet
+        self.initial = len(deck)
+        self.dealt = 0
+        self.running_count = 0
+
+    def restore(self, deck, hidden_cards, initial, dealt, running_count):
+        # Continue tracking a saved deck (see snapshot.py); hidden_cards are the face-down cards in play
+        self.remaining = list(shoe_composition(deck))
+        self.hidden = list(shoe_composition(hidden_cards))
+        self.initial = initial
+        self.dealt = dealt
+        self.running_count = running_count
+
+    def draw(self, deck, face_down=False):
+        # deck.pop() plus bookkeeping. Face-down cards only count once they are revealed.
+        card = deck.pop()
+        i = card_class(card)
+        self.remaining[i] -= 1
+        self.dealt += 1
+        if face_down:
+            self.hidden[i] += 1
+        else:
+            self.running_count += self.tags[i]
+        return card
+
+    def reveal(self, card):
+        # A face-down card was turned over (cards dealt before a reshuffle are ignored)
+        i = card_class(card)
+        if self.hidden[i] > 0:
+            self.hidden[i] -= 1
+            self.running_count += self.tags[i]
+
+    def composition(self):
+        # Cards still in the deck, as a tuple of counts in CARD_CLASSES order
+        return tuple(self.remaining)
+
+    def unseen_composition(self):
+        # Cards the player has not seen: the deck plus face-down cards (e.g. the dealer's hole card)
+        return tuple(r + h for r, h in zip(self.remaining, self.hidden))
+
+    def penetration(self):
+        # Fraction of the deck dealt so far
+        return self.dealt / self.initial if self.initial else 0.0
+
+    def true_count(self):
+        # Running count per deck of unseen cards
+        decks_left = sum(self.unseen_composition()) / self.deck_size
+        return self.running_count / decks_left if decks_left else 0.0
@@ -0,0 +1,236 @@
+import os
+import struct
+import threading
+import time
+import zlib
+
+from pi_rules import SUITS, RANKS, GAME_STATES, DEFAULT_RULES, card_value
+
+# Crash-safe session snapshots.
+# The game hands its state to a SnapshotWriter at every state transition. The state is packed
+# into a small binary record (a few hundred bytes for a full deck) and written by a background
+# thread, so the frame loop never waits on the disk. Each write goes to a temp file that is
+# fsync'ed and then renamed over the previous snapshot, so a crash or power cut leaves either the
+# old or the new snapshot on disk, never a torn one. A CRC32 trailer rejects anything else.
+#
+# Session dict (what encode_session takes and decode_session returns):
+#   coins, bet, bet_confirmed, game_state, round_result (str or None), pi_input,
+#   deck, player, dealer (lists of card dicts, deck in pop order: last card is drawn next),
+#   pending (list of (destination, card) still being dealt, in animation order),
+#   shoe ((initial, dealt, running_count) of the ShoeTracker)
+
+SNAPSHOT_FILE = os.environ.get("PIBJ_SNAPSHOT", os.path.join(os.path.dirname(os.path.abspath(__file__)), "session.snap"))
+MAGIC = b"PIBJ"
+VERSION = 1
+DESTINATIONS = ["player", "dealer"]
+
+_HEADER = struct.Struct("<4sB")
+_FIELDS = struct.Struct("<dIBBHHh")  # coins, bet, session flags, game_state, shoe initial, dealt, running count
+_COUNT = struct.Struct("<H")
+_CARD = struct.Struct("<BB")         # card code, flags
+_VALUE = struct.Struct("<d")         # assigned PI value (only when FLAG_VALUE is set)
+_CRC = struct.Struct("<I")
+
+# Card flags
+FLAG_FACE_DOWN = 1
+FLAG_VALUE = 2
+# Session flags
+FLAG_BET_CONFIRMED = 1
+FLAG_RESULT = 2 # round_result is set (it may be an empty string otherwise)
+
+# One byte per card: suit index * 14 + rank index; the PI card has rank index 13 and suit index 4
+_RANK_CODES = RANKS + ["PI"]
+_SUIT_CODES = SUITS + [""]
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def _encode_card(parts, card):
+    code = _SUIT_CODES.index(card["suit"]) * len(_RANK_CODES) + _RANK_CODES.index(card["rank"])
+    flags = FLAG_FACE_DOWN if card.get("face_down", False) else 0
+    if card.get("joker", False) and card.get("value") is not None:
+        flags |= FLAG_VALUE
+    parts.append(_CARD.pack(code, flags))
+    if flags & FLAG_VALUE:
+        parts.append(_VALUE.pack(card["value"]))
+
+
+def _encode_cards(parts, cards):
+    parts.append(_COUNT.pack(len(cards)))
+    for card in cards:
+        _encode_card(parts, card)
+
+
+def _encode_text(parts, text):
+    data = text.encode("utf-8")
+    parts.append(_COUNT.pack(len(data)))
+    parts.append(data)
+
+
+def encode_session(session):
+    initial, dealt, running_count = session["shoe"]
+    flags = (FLAG_BET_CONFIRMED if session["bet_confirmed"] else 0) | (FLAG_RESULT if session["round_result"] is not None else 0)
+    parts = [_HEADER.pack(MAGIC, VERSION),
+             _FIELDS.pack(session["coins"], session["bet"], flags, GAME_STATES.index(session["game_state"]),
+                          initial, dealt, running_count)]
+    _encode_text(parts, session["round_result"] or "")
+    _encode_text(parts, session["pi_input"])
+    _encode_cards(parts, session["deck"])
+    _encode_cards(parts, session["player"])
+    _encode_cards(parts, session["dealer"])
+    parts.append(_COUNT.pack(len(session["pending"])))
+    for destination, card in session["pending"]:
+        parts.append(bytes([DESTINATIONS.index(destination)]))
+        _encode_card(parts, card)
+    data = b"".join(parts)
+    return data + _CRC.pack(zlib.crc32(data))
+
+
+class _Reader:
+    def __init__(self, data, rules):
+        self.data = data
+        self.offset = 0
+        self.rules = rules
+
+    def unpack(self, fmt):
+        values = fmt.unpack_from(self.data, self.offset)
+        self.offset += fmt.size
+        return values
+
+    def byte(self):
+        value = self.data[self.offset]
+        self.offset += 1
+        return value
+
+    def text(self):
+        (length,) = self.unpack(_COUNT)
+        text = self.data[self.offset:self.offset + length].decode("utf-8")
+        self.offset += length
+        return text
+
+    def card(self):
+        code, flags = self.unpack(_CARD)
+        suit, rank = _SUIT_CODES[code // len(_RANK_CODES)], _RANK_CODES[code % len(_RANK_CODES)]
+        face_down = bool(flags & FLAG_FACE_DOWN)
+        if rank == "PI":
+            value = self.unpack(_VALUE)[0] if flags & FLAG_VALUE else None
+            return {"rank": "PI", "suit": "", "value": value, "face_down": face_down, "joker": True}
+        # Card values come from the current rules, like a freshly built deck
+        return {"rank": rank, "suit": suit, "value": card_value(rank, self.rules), "face_down": face_down}
+
+    def cards(self):
+        (count,) = self.unpack(_COUNT)
+        return [self.card() for _ in range(count)]
+
+
+def decode_session(data, rules=DEFAULT_RULES):
+    if len(data) < _HEADER.size + _CRC.size:
+        raise SnapshotError("snapshot too short")
+    (crc,) = _CRC.unpack_from(data, len(data) - _CRC.size)
+    data = data[:-_CRC.size]
+    if zlib.crc32(data) != crc:
+        raise SnapshotError("snapshot checksum mismatch")
+    try:
+        reader = _Reader(data, rules)
+        magic, version = reader.unpack(_HEADER)
+        if magic != MAGIC or version != VERSION:
+            raise SnapshotError(f"unsupported snapshot format {magic!r} v{version}")
+        coins, bet, flags, state, initial, dealt, running_count = reader.unpack(_FIELDS)
+        round_result = reader.text()
+        session = {
+            "coins": int(coins) if coins.is_integer() else coins,
+            "bet": bet,
+            "bet_confirmed": bool(flags & FLAG_BET_CONFIRMED),
+            "game_state": GAME_STATES[state],
+            "round_result": round_result if flags & FLAG_RESULT else None,
+            "pi_input": reader.text(),
+            "deck": reader.cards(),
+            "player": reader.cards(),
+            "dealer": reader.cards(),
+            "shoe": (initial, dealt, running_count),
+        }
+        (count,) = reader.unpack(_COUNT)
+        session["pending"] = [(DESTINATIONS[reader.byte()], reader.card()) for _ in range(count)]
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise SnapshotError(f"corrupt snapshot: {e}") from e
+    return session
+
+
+def write_atomic(path, data):
+    # Temp file + fsync + rename: readers only ever see a complete file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    if hasattr(os, "O_DIRECTORY"):
+        # Make the rename itself durable (POSIX only)
+        dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def load_snapshot(path=SNAPSHOT_FILE, rules=DEFAULT_RULES):
+    # Returns the saved session, or None when there is no usable snapshot
+    start = time.perf_counter()
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        session = decode_session(data, rules)
+    except FileNotFoundError:
+        return None
+    except (OSError, SnapshotError) as e:
+        print(f"Ignoring snapshot {path}: {e}")
+        return None
+    print(f"Loaded snapshot {path} ({len(data)} bytes) in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return session
+
+
+class SnapshotWriter:
+    # Background writer. submit() only swaps in the newest encoded snapshot and returns; if the
+    # disk is slow, intermediate snapshots are skipped and only the latest one is written.
+    def __init__(self, path=SNAPSHOT_FILE):
+        self.path = path
+        self.pending = None
+        self.closed = False
+        self.failing = False # A write failed; warned about once until a write succeeds again
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name="snapshot-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, data):
+        with self.condition:
+            self.pending = data
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.closed:
+                    self.condition.wait()
+                data, self.pending = self.pending, None
+                if data is None:
+                    return
+            try:
+                write_atomic(self.path, data)
+            except OSError as e:
+                if not self.failing:
+                    print(f"WARNING: cannot save the session to {self.path}: {e}. "
+                          f"Coins will not survive a restart until this is fixed (set PIBJ_SNAPSHOT to a writable path)")
+                    self.failing = True
+            else:
+                if self.failing:
+                    print(f"Session saved to {self.path} again")
+                    self.failing = False
+
+    def close(self):
+        # Write whatever is still pending, then stop the thread
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
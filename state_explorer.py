@@ -0,0 +1,261 @@
+import argparse
+import collections
+import math
+import struct
+import time
+
+from pi_rules import (DEFAULT_RULES, STARTING_COINS, WINNING_COIN_TARGET, GAME_STATES, CARD_CLASSES,
+                      assign_dealer_pi, settle)
+
+# Exhaustive explorer for the game_state machine in main_new.py.
+# Breadth-first search over every reachable game situation: each key press, click, PI value, bet
+# and card the deck can deal is a transition, following main() exactly (including the menu and
+# restart-confirmation overlays). States are packed into short byte strings (see _encode) and kept
+# in a visited set, so a few million states fit comfortably in memory. Its speed depends on the
+# machine; the run prints its own states-per-minute rate. Afterwards it reports:
+#   dead ends  - states where the game cannot go on except by restarting (R / menu restart)
+#   anomalies  - states that should not exist, e.g. a bet changed after its coins were taken
+#   unreached  - game_state values no path leads to
+# Run it after editing the rules (or the transitions below, when main() changes) before shipping.
+#
+# Cards are drawn per card class from the shoe composition, which is all the rules can tell
+# apart. PI inputs cover every value from 1 to one past the threshold: larger values bust exactly
+# like that one. Bets cover every amount through UP/DOWN, or only the given amounts with bets=.
+
+BETTING, DEALING, IDLE, DEALER_TURN, ROUND_END, GAME_OVER, GAME_WON = range(len(GAME_STATES))
+NO_OVERLAY, MENU, CONFIRM_RESTART = range(3)
+OVERLAYS = ["", "menu", "confirm restart"]
+
+# phase, overlay, bet confirmed, unassigned player PI cards, coins, bet, coins taken for the bet, player total
+_HEAD = struct.Struct("<BBBBdddd")
+_NONE = float("nan") # Unassigned dealer PI card
+
+
+def _encode(phase, overlay, confirmed, player_pi, coins, bet, staked, player_total, dealer, counts):
+    return (_HEAD.pack(phase, overlay, confirmed, player_pi, coins, bet, staked, player_total)
+            + bytes(counts)
+            + struct.pack(f"<{len(dealer)}d", *[_NONE if v is None else v for v in dealer]))
+
+
+def _decode(key):
+    fields = _HEAD.unpack_from(key)
+    n = len(CARD_CLASSES)
+    counts = tuple(key[_HEAD.size:_HEAD.size + n])
+    rest = key[_HEAD.size + n:]
+    dealer = tuple(None if math.isnan(v) else v for v in struct.unpack(f"<{len(rest) // 8}d", rest))
+    return fields + (dealer, counts)
+
+
+def describe(key):
+    phase, overlay, confirmed, player_pi, coins, bet, staked, player_total, dealer, counts = _decode(key)
+    text = f"{GAME_STATES[phase]} coins={coins:g} bet={bet:g}"
+    if confirmed:
+        text += f" (confirmed, {staked:g} taken)"
+    if phase != BETTING:
+        text += f" player={player_total:.2f}" + (f"+{player_pi} PI" if player_pi else "")
+        text += " dealer=[" + ", ".join("PI" if v is None else f"{v:.2f}" for v in dealer) + "]"
+    if overlay:
+        text += f" [{OVERLAYS[overlay]}]"
+    return text
+
+
+class Exploration:
+    def __init__(self):
+        self.states = 0
+        self.transitions = 0
+        self.truncated = False
+        self.seconds = 0.0
+        self.phase_counts = collections.Counter()
+        self.dead_ends = collections.Counter()   # reason -> count
+        self.anomalies = collections.Counter()   # reason -> count
+        self.examples = {}                       # reason -> first state found (description)
+
+    def note(self, counter, reason, key):
+        counter[reason] += 1
+        self.examples.setdefault(reason, describe(key))
+
+    def report(self):
+        rate = self.states / self.seconds * 60 if self.seconds else 0
+        print(f"Explored {self.states} states, {self.transitions} transitions in {self.seconds:.1f}s "
+              f"({rate / 1e6:.2f}M states/min){' - TRUNCATED at max_states' if self.truncated else ''}")
+        for phase, name in enumerate(GAME_STATES):
+            print(f"  {name:<12} {self.phase_counts[phase]:>10}")
+        unreached = [name for phase, name in enumerate(GAME_STATES) if not self.phase_counts[phase]]
+        if unreached:
+            print(f"Unreached game states: {', '.join(unreached)}")
+        for title, counter in (("Dead ends", self.dead_ends), ("Anomalies", self.anomalies)):
+            print(f"{title}: {sum(counter.values()) or 'none'}")
+            for reason, count in counter.most_common():
+                print(f"  {count:>8}  {reason}\n            e.g. {self.examples[reason]}")
+
+
+def explore(rules=DEFAULT_RULES, bets=None, pi_values=None, menu=True, max_states=2_000_000,
+            start_coins=STARTING_COINS, target=WINNING_COIN_TARGET):
+    values = rules.class_values()
+    fresh = rules.fresh_shoe()
+    if pi_values is None:
+        pi_values = range(1, math.floor(rules.threshold) + 2)
+    result = Exploration()
+    start = time.perf_counter()
+
+    def draws(counts):
+        # (card value or None for PI, counts after drawing); an empty shoe is reshuffled
+        if not any(counts):
+            counts = fresh
+        for i, c in enumerate(counts):
+            if c:
+                yield values[i], counts[:i] + (c - 1,) + counts[i + 1:]
+
+    def add_value(total, pi_count, value):
+        return (total, pi_count + 1) if value is None else (total + value, pi_count)
+
+    def dealer_total(dealer):
+        total = 0
+        for value in dealer:
+            if value is not None:
+                total += value
+        return total
+
+    def determine_winner(overlay, coins, bet, staked, player_total, dealer, counts):
+        # determine_winner(): payout on the current bet, game_won at the target
+        _, multiplier = settle(player_total, dealer_total(dealer), rules)
+        coins += bet * multiplier
+        phase = GAME_WON if coins >= target else ROUND_END
+        return _encode(phase, overlay, 1, 0, coins, bet, staked, player_total, dealer, counts)
+
+    def dealer_turn(overlay, coins, bet, staked, player_total, dealer, counts):
+        # dealer_turn(): assign PI cards, then either one hit (animated, re-entered afterwards) or stand
+        dealer = tuple(assign_dealer_pi(dealer, rules))
+        if dealer_total(dealer) < rules.dealer_stand:
+            for value, after in draws(counts):
+                yield _encode(DEALER_TURN, overlay, 1, 0, coins, bet, staked, player_total, dealer + (value,), after)
+        else:
+            yield determine_winner(overlay, coins, bet, staked, player_total, dealer, counts)
+
+    def successors(key):
+        # Yields (next state, is_play): is_play is False for restarts and overlay-only changes
+        phase, overlay, confirmed, player_pi, coins, bet, staked, player_total, dealer, counts = _decode(key)
+
+        def same(**changes):
+            fields = dict(phase=phase, overlay=overlay, confirmed=confirmed, player_pi=player_pi, coins=coins,
+                          bet=bet, staked=staked, player_total=player_total, dealer=dealer, counts=counts)
+            fields.update(changes)
+            return _encode(**fields)
+
+        restart = _encode(BETTING, overlay, 0, 0, start_coins, 0, 0, 0, (), fresh)
+
+        # Overlays: menu icon toggles the menu; Y/N answer the restart confirmation
+        if menu:
+            if overlay == CONFIRM_RESTART:
+                yield _encode(BETTING, NO_OVERLAY, 0, 0, start_coins, 0, 0, 0, (), fresh), False
+                yield same(overlay=NO_OVERLAY), False
+            else:
+                yield same(overlay=MENU if overlay == NO_OVERLAY else NO_OVERLAY), False
+                if overlay == MENU:
+                    yield same(overlay=CONFIRM_RESTART), False # Restart option
+        keys = overlay != CONFIRM_RESTART # Keyboard is reserved for Y/N while confirming
+
+        if phase == BETTING:
+            if keys:
+                if bets is None:
+                    # UP/DOWN also work after ENTER, while the chip animation runs
+                    if bet < coins:
+                        yield same(bet=bet + 1), True
+                    if bet > 0:
+                        yield same(bet=bet - 1), True
+                    if not confirmed and 0 < bet <= coins:
+                        yield same(confirmed=1, coins=coins - bet, staked=bet), True
+                elif not confirmed:
+                    for amount in bets:
+                        if 0 < amount <= coins:
+                            yield same(confirmed=1, coins=coins - amount, bet=amount, staked=amount), True
+            if not confirmed and coins > 0:
+                yield same(confirmed=1, coins=0, bet=coins, staked=coins), True # ALL IN click
+            if confirmed:
+                # Chip animation done: deal player, dealer up, player, dealer hole
+                for v1, c1 in draws(counts):
+                    for v2, c2 in draws(c1):
+                        for v3, c3 in draws(c2):
+                            for v4, c4 in draws(c3):
+                                total, pi_count = add_value(*add_value(0, 0, v1), v3)
+                                yield _encode(DEALING, overlay, 1, pi_count, coins, bet, staked, total, (v2, v4), c4), True
+
+        elif phase == DEALING:
+            # Animations done: bust check, then PI input or hit/stand
+            if player_total > rules.threshold:
+                yield determine_winner(overlay, coins, bet, staked, player_total, dealer, counts), True
+            else:
+                yield same(phase=IDLE), True
+
+        elif phase == IDLE:
+            if player_pi:
+                if keys:
+                    for value in pi_values:
+                        total = player_total + value
+                        if total > rules.threshold:
+                            yield determine_winner(overlay, coins, bet, staked, total, dealer, counts), True
+                        else:
+                            yield same(player_pi=player_pi - 1, player_total=total), True
+            elif overlay == NO_OVERLAY:
+                # HIT / STAND buttons are only active without overlays
+                for value, after in draws(counts):
+                    total, pi_count = add_value(player_total, 0, value)
+                    yield same(phase=DEALING, player_pi=pi_count, player_total=total, counts=after), True
+                for next_key in dealer_turn(overlay, coins, bet, staked, player_total, dealer, counts):
+                    yield next_key, True
+
+        elif phase == DEALER_TURN:
+            for next_key in dealer_turn(overlay, coins, bet, staked, player_total, dealer, counts):
+                yield next_key, True
+
+        elif phase == ROUND_END:
+            if keys:
+                if coins >= target or coins <= 0:
+                    yield restart, False # R
+                else:
+                    yield _encode(BETTING, overlay, 0, 0, coins, 0, 0, 0, (), fresh), True # SPACE: reset_round()
+
+        elif phase in (GAME_OVER, GAME_WON):
+            if keys:
+                yield restart, False # R
+
+    initial = _encode(BETTING, NO_OVERLAY, 0, 0, start_coins, 0, 0, 0, (), fresh)
+    visited = {initial}
+    frontier = collections.deque([initial])
+    while frontier:
+        key = frontier.popleft()
+        phase, overlay, confirmed, _, coins, bet, staked = _HEAD.unpack_from(key)[:7]
+        result.states += 1
+        result.phase_counts[phase] += 1
+        if confirmed and bet != staked:
+            result.note(result.anomalies, f"{GAME_STATES[phase]}: bet differs from the coins taken for it", key)
+
+        can_play = False
+        for next_key, is_play in successors(key):
+            result.transitions += 1
+            can_play = can_play or is_play
+            if next_key not in visited:
+                if len(visited) >= max_states:
+                    result.truncated = True
+                    continue
+                visited.add(next_key)
+                frontier.append(next_key)
+        if not can_play and phase not in (GAME_OVER, GAME_WON) and overlay == NO_OVERLAY:
+            reason = f"{GAME_STATES[phase]} with {coins:g} coins: only a restart continues"
+            if phase == ROUND_END and coins <= 0:
+                reason = "round_end with no coins: game_over is never entered, only R restarts"
+            result.note(result.dead_ends, reason, key)
+
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enumerate reachable game states and report dead ends")
+    parser.add_argument("--max-states", type=int, default=2_000_000)
+    parser.add_argument("--bets", type=int, nargs="+", help="only these bet amounts (plus ALL IN); default: every amount")
+    parser.add_argument("--coins", type=int, default=STARTING_COINS, help="starting coins")
+    parser.add_argument("--no-menu", action="store_true", help="leave out the menu and restart overlays")
+    args = parser.parse_args()
+
+    explore(bets=args.bets, menu=not args.no_menu, max_states=args.max_states, start_coins=args.coins).report()
@@ -0,0 +1,182 @@
+import argparse
+import importlib
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from pi_rules import DEFAULT_RULES, create_deck, play_round, stand_on_dealer_value, largest_safe_pi
+
+# Strategy tournament: every strategy plays the very same shuffled decks (common random numbers),
+# so differences between strategies are not drowned out by the luck of the deal. Rounds run in
+# worker processes in chunks; each chunk returns running statistics (count, mean, sum of squared
+# deviations) that are merged as they arrive, so memory stays constant however many rounds run.
+# Every round is played on a new deck, as in the game, and scored as the net payout per coin bet.
+#
+# A strategy is a (hit_policy, pi_policy) pair with the signatures of pi_rules.play_round; both
+# must be module-level functions so they can be sent to the worker processes.
+
+
+def never_hit(player_total, upcard, rules=DEFAULT_RULES):
+    return False
+
+
+def hit_below_18(player_total, upcard, rules=DEFAULT_RULES):
+    return player_total < 18
+
+
+def upcard_aware(player_total, upcard, rules=DEFAULT_RULES):
+    # Stand early against a low dealer upcard (the dealer has to keep hitting), else mirror the dealer
+    upcard_value = upcard["value"]
+    if upcard_value is not None and upcard_value <= 6:
+        return player_total < 12
+    return player_total < rules.dealer_stand
+
+
+def small_pi(player_total, upcard, rules=DEFAULT_RULES):
+    # PI cards always count 1, leaving room for more hits
+    return 1
+
+
+STRATEGIES = {
+    "mirror-dealer": (stand_on_dealer_value, largest_safe_pi),
+    "never-hit": (never_hit, largest_safe_pi),
+    "hit-below-18": (hit_below_18, largest_safe_pi),
+    "upcard-aware": (upcard_aware, largest_safe_pi),
+    "mirror-dealer-small-pi": (stand_on_dealer_value, small_pi),
+}
+
+
+class RunningStats:
+    # Welford's streaming mean/variance; merge() combines two partial results (Chan et al.)
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def merge(self, other):
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def confidence_interval(self, z=1.96):
+        # Half-width of the (default 95%) confidence interval of the mean
+        return z * math.sqrt(self.variance / self.count) if self.count else float("inf")
+
+
+class RefillShuffle:
+    # Shuffles like random.Random(seed), but only seeds a generator when a reshuffle actually
+    # happens (rarely: a round seldom uses up a deck), since seeding costs more than a round
+    def __init__(self, seed):
+        self.seed = seed
+        self.rng = None
+
+    def shuffle(self, items):
+        if self.rng is None:
+            self.rng = random.Random(self.seed)
+        self.rng.shuffle(items)
+
+
+def play_chunk(strategies, rules, seed, chunk, rounds):
+    # Returns (stats per strategy, stats of the difference to the first strategy per strategy).
+    # The decks depend only on (seed, chunk), so every strategy and every run sees the same ones,
+    # including the reshuffled deck a long round may need: each strategy gets a generator seeded alike.
+    rng = random.Random(f"{seed}:{chunk}")
+    stats = [RunningStats() for _ in strategies]
+    differences = [RunningStats() for _ in strategies]
+    for _ in range(rounds):
+        deck = create_deck(rules, rng)
+        refill_seed = rng.getrandbits(64)
+        baseline = None
+        for i, (hit_policy, pi_policy) in enumerate(strategies):
+            result, multiplier = play_round(list(deck), hit_policy, pi_policy, rules, RefillShuffle(refill_seed))
+            net = multiplier - 1
+            if baseline is None:
+                baseline = net
+            stats[i].add(net)
+            differences[i].add(net - baseline)
+    return stats, differences
+
+
+def run_tournament(strategies, rounds, rules=DEFAULT_RULES, seed=314, chunk_size=20000, workers=None):
+    # strategies: {name: (hit_policy, pi_policy)}. Returns {name: (stats, difference to the first strategy)}
+    names = list(strategies)
+    policies = [strategies[name] for name in names]
+    totals = [RunningStats() for _ in names]
+    differences = [RunningStats() for _ in names]
+    chunks = [(chunk, min(chunk_size, rounds - start)) for chunk, start in enumerate(range(0, rounds, chunk_size))]
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Keep only a few chunks in flight, so a billion-round run does not queue millions of futures
+        max_in_flight = 2 * workers
+        pending = set()
+        next_chunk = 0
+        done_rounds = 0
+        while next_chunk < len(chunks) or pending:
+            while next_chunk < len(chunks) and len(pending) < max_in_flight:
+                chunk, size = chunks[next_chunk]
+                pending.add(pool.submit(play_chunk, policies, rules, seed, chunk, size))
+                next_chunk += 1
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stats, diffs = future.result()
+                for i in range(len(names)):
+                    totals[i].merge(stats[i])
+                    differences[i].merge(diffs[i])
+                done_rounds += stats[0].count
+            print(f"Played {done_rounds}/{rounds} rounds")
+
+    return {name: (totals[i], differences[i]) for i, name in enumerate(names)}
+
+
+def print_leaderboard(results):
+    baseline = next(iter(results))
+    print(f"{'rank':<5}{'strategy':<26}{'edge per coin':>22}{'vs ' + baseline:>30}")
+    ranked = sorted(results.items(), key=lambda item: item[1][0].mean, reverse=True)
+    for rank, (name, (stats, difference)) in enumerate(ranked, 1):
+        edge = f"{stats.mean:+.4f} ± {stats.confidence_interval():.4f}"
+        versus = "-" if name == baseline else f"{difference.mean:+.4f} ± {difference.confidence_interval():.4f}"
+        print(f"{rank:<5}{name:<26}{edge:>22}{versus:>30}")
+    print("(95% confidence intervals; the comparison is paired over identical decks)")
+
+
+def load_strategy(spec):
+    # A built-in name, or "module:hit_function[:pi_function]" (PI policy defaults to largest_safe_pi)
+    if spec in STRATEGIES:
+        return STRATEGIES[spec]
+    module_name, _, functions = spec.partition(":")
+    if not functions:
+        raise ValueError(f"Unknown strategy '{spec}'. Built-in: {', '.join(STRATEGIES)}")
+    module = importlib.import_module(module_name)
+    hit_name, _, pi_name = functions.partition(":")
+    return getattr(module, hit_name), getattr(module, pi_name) if pi_name else largest_safe_pi
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play strategies against identical decks and rank them")
+    parser.add_argument("strategies", nargs="*", default=list(STRATEGIES),
+                        help="built-in names or module:hit_function[:pi_function]; the first is the baseline")
+    parser.add_argument("--rounds", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=314)
+    parser.add_argument("--chunk-size", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    strategies = {spec: load_strategy(spec) for spec in args.strategies}
+    results = run_tournament(strategies, args.rounds, seed=args.seed, chunk_size=args.chunk_size, workers=args.workers)
+    print_leaderboard(results)